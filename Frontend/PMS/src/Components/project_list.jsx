@@ -22,10 +22,10 @@ function Projects() {
       <ul>
         {projects.map(p => (
           <li
-            key={p.project_members[0].project}
+            key={p.id}
             style={{ cursor: "pointer", color: "blue" }}
             onClick={() =>
-              navigate(`/projects/${p.project_members[0].project}`)
+              navigate(`/projects/${p.id}`)
             }
           >
             {p.name}
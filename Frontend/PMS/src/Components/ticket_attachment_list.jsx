@@ -1,14 +1,18 @@
 import { useEffect, useState } from "react";
 import api from "../api/axiosConfig";
 
-function TicketAttachmentList({ projectId, storyId, ticketId }) {
-  const [attachments, setAttachments] = useState([]);
+function TicketAttachmentList({ projectId, storyId, ticketId, attachments: initial }) {
+  const [attachments, setAttachments] = useState(initial || []);
 
   useEffect(() => {
+    if (initial) {
+      setAttachments(initial);
+      return;
+    }
     api
       .get(`/tickets/projects/${projectId}/stories/${storyId}/tickets/${ticketId}/attachments/`)
       .then(res => setAttachments(res.data.results || res.data));
-  }, [projectId, storyId, ticketId]);
+  }, [projectId, storyId, ticketId, initial]);
 
   return (
     <div>
@@ -1,14 +1,18 @@
 import { useEffect, useState } from "react";
 import api from "../api/axiosConfig";
 
-function TicketCommentList({ projectId, storyId, ticketId }) {
-  const [comments, setComments] = useState([]);
+function TicketCommentList({ projectId, storyId, ticketId, comments: initial }) {
+  const [comments, setComments] = useState(initial || []);
 
   useEffect(() => {
+    if (initial) {
+      setComments(initial);
+      return;
+    }
     api
       .get(`/tickets/projects/${projectId}/stories/${storyId}/tickets/${ticketId}/comments/`)
       .then(res => setComments(res.data.results || res.data));
-  }, [projectId, storyId, ticketId]);
+  }, [projectId, storyId, ticketId, initial]);
 
   return (
     <div>
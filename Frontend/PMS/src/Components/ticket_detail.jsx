@@ -1,15 +1,31 @@
+import { useEffect, useState } from "react";
+import api from "../api/axiosConfig";
 import TicketCommentList from "./ticket_comment_list";
 import TicketCommentCreate from "./ticket_comment_create";
 import TicketAttachmentList from "./ticket_attachment_list";
 import TicketAttachmentCreate from "./ticket_attachment_create";
 
 function TicketDetail({ projectId, storyId, ticketId }) {
+  const [details, setDetails] = useState(null);
+
+  useEffect(() => {
+    api
+      .get(`/tickets/projects/${projectId}/stories/${storyId}/tickets/${ticketId}/details/`)
+      .then(res => setDetails(res.data));
+  }, [projectId, storyId, ticketId]);
+
+  if (!details) return null;
+
+  const comments = details.comments.results;
+  const attachments = comments.flatMap(c => c.attachments);
+
   return (
     <div style={{ marginLeft: 20 }}>
       <TicketCommentList
         projectId={projectId}
         storyId={storyId}
         ticketId={ticketId}
+        comments={comments}
       />
       <TicketCommentCreate
         projectId={projectId}
@@ -21,6 +37,7 @@ function TicketDetail({ projectId, storyId, ticketId }) {
         projectId={projectId}
         storyId={storyId}
         ticketId={ticketId}
+        attachments={attachments}
       />
       <TicketAttachmentCreate
         projectId={projectId}
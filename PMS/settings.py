@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'base',
     'tickets',
@@ -75,12 +76,15 @@ ACCOUNT_SIGNUP_FIELDS = [
 SITE_ID = 2
 
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
+    'users.backends.RehashingModelBackend',
     'allauth.account.auth_backends.AuthenticationBackend',
 ]
 
 MIDDLEWARE = [
+    'base.middleware.RequestLogMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'base.middleware.QueryBudgetMiddleware',
+    'base.middleware.ReadReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -91,6 +95,27 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',
 ]
 
+# Middleware the JWT-authenticated APIs don't need. Requests under
+# PATH_PREFIXES skip it (base.handlers, used by PMS.wsgi / PMS.asgi); the
+# admin, allauth (/accounts/) and OAuth pages keep the full chain above.
+API_MIDDLEWARE = {
+    'PATH_PREFIXES': ['/users/', '/misc/', '/projects/', '/tickets/', '/monitoring/'],
+    'SKIPPED_MIDDLEWARE': [
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.middleware.csrf.CsrfViewMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+        'django.middleware.clickjacking.XFrameOptionsMiddleware',
+        'allauth.account.middleware.AccountMiddleware',
+    ],
+}
+
+QUERY_BUDGET = {
+    'ENABLED': DEBUG,
+    'RAISE': False,
+    'N_PLUS_ONE_THRESHOLD': 3,
+}
+
 ALLOWED_HOSTS = [
     "localhost",
     "127.0.0.1",
@@ -98,15 +123,24 @@ ALLOWED_HOSTS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
          # Optional
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     "DEFAULT_PAGINATION_CLASS":
-        "rest_framework.pagination.PageNumberPagination",
+        "base.pagination.KeysetPagination",
     "PAGE_SIZE": 10,
+    'DEFAULT_RENDERER_CLASSES': (
+        'base.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'base.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 ROOT_URLCONF = 'PMS.urls'
@@ -153,6 +187,21 @@ CORS_ALLOW_METHODS = [
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connections are reused across requests: either persistent per worker thread
+# (DB_CONN_MAX_AGE seconds) or, with DB_POOL=true, from a psycopg pool (needs
+# psycopg[pool]; Django requires CONN_MAX_AGE=0 then). Connections opened by
+# the WSGI/ASGI handlers cap every statement at DB_STATEMENT_TIMEOUT_MS;
+# management commands (migrate, load_geo, load_pincodes, the benches) run
+# unbounded unless DB_COMMAND_STATEMENT_TIMEOUT_MS is set (see base.db).
+
+DB_POOL = os.getenv('DB_POOL', '').lower() in ('1', 'true')
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))
+
+STATEMENT_TIMEOUT = {
+    'REQUEST_MS': DB_STATEMENT_TIMEOUT_MS,
+    'COMMAND_MS': int(os.getenv('DB_COMMAND_STATEMENT_TIMEOUT_MS', '0')),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -160,11 +209,74 @@ DATABASES = {
         'USER':'postgres',
         'PASSWORD':'postgres',
         'HOST':'localhost',
-        'PORT': '5432'
+        'PORT': '5432',
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+}
+
+if DB_POOL:
+    # CONN_HEALTH_CHECKS makes the pool check connections before handing them out
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+        'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+    }
+
+# Read replicas: DB_REPLICA_HOSTS="host1:5432,host2:5432" adds aliases replica1,
+# replica2... with the primary's credentials. Views with `read_replica = True`
+# read from the least lagged one on GET/HEAD/OPTIONS (see base.routers).
+
+DB_REPLICA_HOSTS = [host for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host]
+
+for index, replica_host in enumerate(DB_REPLICA_HOSTS, start=1):
+    host, _, port = replica_host.partition(':')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['base.routers.ReadReplicaRouter']
+
+READ_REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias != 'default'],
+    'MAX_LAG_SECONDS': float(os.getenv('DB_REPLICA_MAX_LAG_SECONDS', '5')),
+    'LAG_CHECK_INTERVAL': 2,
 }
 
 
+# Cache
+# Shared between workers through Redis when REDIS_URL is set, or through files
+# under CACHE_DIR on a single host; otherwise per-process memory.
+
+REDIS_URL = os.getenv('REDIS_URL')
+CACHE_DIR = os.getenv('CACHE_DIR')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif CACHE_DIR:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_DIR,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -183,6 +295,40 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# PASSWORD_HASHER picks the hasher for new passwords; the others stay listed
+# so existing hashes keep verifying, and are rehashed at the next login.
+# Cost parameters (and the async views' hashing pool) are tuned through
+# PASSWORD_HASHING, see users.hashers. argon2 needs argon2-cffi installed.
+
+_PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'users.hashers.TunedScryptPasswordHasher',
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [_PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
+
+
+def _optional_int(name):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+PASSWORD_HASHING = {
+    'PBKDF2_ITERATIONS': _optional_int('PBKDF2_ITERATIONS'),
+    'ARGON2_TIME_COST': _optional_int('ARGON2_TIME_COST'),
+    'ARGON2_MEMORY_COST': _optional_int('ARGON2_MEMORY_COST'),
+    'ARGON2_PARALLELISM': _optional_int('ARGON2_PARALLELISM'),
+    'SCRYPT_WORK_FACTOR': _optional_int('SCRYPT_WORK_FACTOR'),
+    'SCRYPT_BLOCK_SIZE': _optional_int('SCRYPT_BLOCK_SIZE'),
+    'SCRYPT_PARALLELISM': _optional_int('SCRYPT_PARALLELISM'),
+    'POOL_SIZE': int(os.getenv('PASSWORD_HASHING_POOL_SIZE', os.cpu_count() or 1)),
+    'MAX_PENDING': int(os.getenv('PASSWORD_HASHING_MAX_PENDING', '64')),
+}
+
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -210,6 +356,18 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME_GRACE_PERIOD': timedelta(minutes=0),
 }
 
+# Concurrent refreshes of the same refresh token share one result for
+# GRACE_SECONDS (users.refresh).
+TOKEN_REFRESH = {
+    'GRACE_SECONDS': float(os.getenv('TOKEN_REFRESH_GRACE_SECONDS', '10')),
+    'WAIT_SECONDS': 5,
+}
+
+# Request code only logs to the "queue" handler, which hands records to a
+# writer thread (base.log); the thread writes them with the handlers of the
+# "base.log.writer" logger. Records below WARNING are sampled per logger.
+LOG_FILE = os.getenv('LOG_FILE', 'django.log')
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -223,6 +381,23 @@ LOGGING = {
             "format": "[{asctime}] {levelname} {name} {message}",
             "style": "{",
         },
+        "json": {
+            "()": "base.log.JSONFormatter",
+        },
+    },
+
+    "filters": {
+        "request_context": {
+            "()": "base.log.RequestContextFilter",
+        },
+        "sampling": {
+            "()": "base.log.SamplingFilter",
+            "rates": {
+                "base.requests": float(os.getenv('LOG_SAMPLE_REQUESTS', '1')),
+                "users.views": float(os.getenv('LOG_SAMPLE_USERS_VIEWS', '1')),
+            },
+            "default": float(os.getenv('LOG_SAMPLE_DEFAULT', '1')),
+        },
     },
 
     "handlers": {
@@ -231,14 +406,31 @@ LOGGING = {
             "formatter": "simple",
         },
         "file": {
-            "class": "logging.FileHandler",
-            "filename": "django.log",
-            "formatter": "verbose",
+            "class": "base.log.SizedTimedRotatingFileHandler",
+            "filename": LOG_FILE,
+            "when": "midnight",
+            "maxBytes": int(os.getenv('LOG_MAX_BYTES', 50 * 1024 * 1024)),
+            "backupCount": int(os.getenv('LOG_BACKUP_COUNT', '14')),
+            "formatter": "json",
+            "delay": True,
+        },
+        "queue": {
+            "class": "base.log.QueueHandler",
+            "writer": "base.log.writer",
+            "queue_size": int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+            "filters": ["request_context", "sampling"],
+        },
+    },
+
+    "loggers": {
+        "base.log.writer": {
+            "handlers": ["console", "file"],
+            "propagate": False,
         },
     },
 
     "root": {
-        "handlers": ["console", "file"],
+        "handlers": ["queue"],
         "level": "INFO",
     },
 }
@@ -14,6 +14,8 @@ urlpatterns = [
     
     path('accounts/', include('allauth.urls')),
 
-    path('oauth/',include("oauth.urls"))
+    path('oauth/',include("oauth.urls")),
+
+    path('monitoring/', include('base.urls')),
     
 ]
\ No newline at end of file
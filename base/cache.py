@@ -0,0 +1,37 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+
+
+def cache_version_key(group):
+    return f'cache-version:{group}'
+
+
+def get_cache_version(group):
+    """
+    Current version of a cached data group. Starts from the clock rather
+    than 1, so a version lost to eviction never comes back with stale
+    entries still stored under it.
+    """
+    version = cache.get(cache_version_key(group))
+    if version is None:
+        version = int(time.time() * 1000)
+        if not cache.add(cache_version_key(group), version, None):
+            version = cache.get(cache_version_key(group), version)
+    return version
+
+
+def bump_cache_version(group):
+    """Invalidate everything cached for `group`; old entries just expire."""
+    try:
+        return cache.incr(cache_version_key(group))
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(cache_version_key(group), version, None)
+        return version
+
+
+def response_cache_key(group, version, url):
+    digest = hashlib.sha1(url.encode()).hexdigest()
+    return f'response:{group}:{version}:{digest}'
@@ -0,0 +1,138 @@
+"""
+Compiled read path for list endpoints.
+
+A plan is built once per serializer class: every readable field is mapped to
+a `.values_list()` path plus the field's own `to_representation`. Rows are then
+rendered straight from tuples, with no per-row field binding or attribute
+traversal, and the output matches the serializer's. Serializers with fields
+that can't be read from a column (method fields, nested serializers, files,
+`source='*'`, related objects with a custom `__str__`) are not compiled.
+"""
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+from .models import BaseModel
+
+COLUMN_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField, serializers.DateField,
+    serializers.DateTimeField, serializers.DecimalField, serializers.FloatField, serializers.IntegerField,
+    serializers.UUIDField,
+)
+
+# fields whose output depends on more than the column value
+EXCLUDED_FIELDS = (serializers.FileField, serializers.HiddenField, serializers.SerializerMethodField)
+
+# extra columns the keyset paginator reads from the last row of a page
+CURSOR_COLUMNS = ('pk', 'created_at')
+
+
+def _identity(value):
+    return value
+
+
+def _str_path(related_model, path):
+    """Column `str(related_object)` renders, for the `__str__`s we know."""
+    if related_model.__str__ is AbstractBaseUser.__str__:
+        return f'{path}__{related_model.USERNAME_FIELD}'
+    if related_model.__str__ is BaseModel.__str__:
+        return f'{path}__pk'
+    return None
+
+
+def _column(field, model, annotations):
+    """`(values path, converter)` for a serializer field, or None if it can't be compiled."""
+    if isinstance(field, EXCLUDED_FIELDS) or field.source == '*':
+        return None
+
+    attrs = field.source_attrs
+    if len(attrs) == 1 and attrs[0] in annotations:
+        converter = field.to_representation if isinstance(field, COLUMN_FIELDS) else _identity
+        return attrs[0], converter
+
+    path, current = '', model
+    for position, attr in enumerate(attrs):
+        try:
+            model_field = current._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete or model_field.many_to_many:
+            return None
+        path = f'{path}__{attr}' if path else attr
+        last = position == len(attrs) - 1
+
+        if not model_field.is_relation:
+            if not last:
+                return None
+            if isinstance(field, COLUMN_FIELDS):
+                return path, field.to_representation
+            if isinstance(field, serializers.ReadOnlyField):
+                return path, _identity
+            return None
+
+        if last:
+            if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                return path, _identity
+            if isinstance(field, serializers.CharField):
+                str_path = _str_path(model_field.related_model, path)
+                return (str_path, str) if str_path else None
+            return None
+        current = model_field.related_model
+    return None
+
+
+class ReadPlan:
+
+    def __init__(self, columns, paths):
+        # columns: [(output key, index into the row, converter)]
+        self.columns = columns
+        self.paths = paths
+
+    def values(self, queryset):
+        """`queryset` as named tuples carrying every column the plan reads, plus the cursor columns."""
+        return queryset.values_list(*self.paths, named=True)
+
+    def render(self, rows):
+        columns = self.columns
+        data = []
+        for row in rows:
+            item = {}
+            for key, index, converter in columns:
+                value = row[index]
+                item[key] = None if value is None else converter(value)
+            data.append(item)
+        return data
+
+
+_plans = {}
+
+
+def compile_read_plan(serializer_class, queryset):
+    """
+    Plan for rendering `queryset` with `serializer_class`, built once per
+    (serializer class, annotations) and cached. None if not compilable.
+    """
+    annotations = frozenset(queryset.query.annotations)
+    key = (serializer_class, annotations)
+    if key not in _plans:
+        _plans[key] = _build_plan(serializer_class, queryset.model, annotations)
+    return _plans[key]
+
+
+def _build_plan(serializer_class, model, annotations):
+    serializer = serializer_class()
+    paths, columns = [], []
+    for field in serializer._readable_fields:
+        column = _column(field, model, annotations)
+        if column is None:
+            return None
+        path, converter = column
+        if path not in paths:
+            paths.append(path)
+        columns.append((field.field_name, paths.index(path), converter))
+
+    local = {f.name for f in model._meta.concrete_fields}
+    for path in CURSOR_COLUMNS:
+        if path not in paths and (path == 'pk' or path in local):
+            paths.append(path)
+    return ReadPlan(columns, paths)
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db import connections
+
+STATEMENT_TIMEOUT_DEFAULTS = {
+    'REQUEST_MS': 0,
+    'COMMAND_MS': 0,
+}
+
+_serving_requests = False
+
+
+def get_statement_timeout_settings():
+    return {**STATEMENT_TIMEOUT_DEFAULTS, **getattr(settings, 'STATEMENT_TIMEOUT', {})}
+
+
+def serve_requests(serving=True):
+    """Mark this process as a request server (base.handlers), so new connections get REQUEST_MS."""
+    global _serving_requests
+    _serving_requests = serving
+
+
+def apply_statement_timeout(connection):
+    """
+    Cap statements on `connection` at STATEMENT_TIMEOUT['REQUEST_MS'] in
+    request-serving processes and at ['COMMAND_MS'] everywhere else
+    (migrate, load_geo, the benches...); 0 leaves the server default.
+    """
+    config = get_statement_timeout_settings()
+    timeout = config['REQUEST_MS'] if _serving_requests else config['COMMAND_MS']
+    if connection.vendor != 'postgresql' or not timeout:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('statement_timeout', %s, false)", [f'{int(timeout)}ms'])
+
+
+def set_statement_timeout(sender, connection, **kwargs):
+    # connection_created receiver, connected in BaseConfig.ready()
+    apply_statement_timeout(connection)
+
+
+def connection_stats(alias='default'):
+    """
+    Connection handling for a database alias, for monitoring: the pool's
+    counters when the psycopg pool is enabled, otherwise the persistent
+    connection settings and the state of this thread's connection.
+    """
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    stats = {
+        'alias': alias,
+        'vendor': connection.vendor,
+        'pooled': bool(settings_dict.get('OPTIONS', {}).get('pool')),
+        'conn_max_age': settings_dict['CONN_MAX_AGE'],
+        'health_checks': settings_dict['CONN_HEALTH_CHECKS'],
+    }
+    if stats['pooled']:
+        pool = connection.pool
+        stats['pool'] = {**pool.get_stats(), 'min_size': pool.min_size, 'max_size': pool.max_size}
+    else:
+        stats['connection_open'] = connection.connection is not None
+    return stats
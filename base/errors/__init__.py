@@ -1,3 +1,3 @@
 from .messages import error_messages, message
 from .error_codes import *
-from .exceptions import PMValidationError, PMDataIntegrityException
+from .exceptions import PMValidationError, PMDataIntegrityException, QueryBudgetExceeded
@@ -12,7 +12,8 @@ __all__ = [
     'TaskException',
     'NotificationException',
     'PMDataIntegrityException',
-    'PMValidationError'
+    'PMValidationError',
+    'QueryBudgetExceeded',
 ]
 
 
@@ -32,6 +33,10 @@ class PMDataIntegrityException(Exception):
     pass
 
 
+class QueryBudgetExceeded(Exception):
+    pass
+
+
 class PMValidationError(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
     app_code = NO_CODE
@@ -0,0 +1,114 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def parse_field_list(value):
+    """`"id, title,story.title"` -> `['id', 'title', 'story.title']`"""
+    if not value:
+        return []
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class _Unprunable(Exception):
+    """The serializer reads something we can't map to columns (method fields, `source='*'`, properties)."""
+
+
+def _nested_serializer(field):
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    return field if isinstance(field, serializers.Serializer) else None
+
+
+def _collect(serializer, model, select_tree, prefix, columns, joins, prefetches, annotations=()):
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            raise _Unprunable(field.field_name)
+
+        current_model, tree, path = model, select_tree, prefix
+        attrs = field.source_attrs
+        for position, attr in enumerate(attrs):
+            try:
+                model_field = current_model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                if not path and attr in annotations:
+                    break
+                raise _Unprunable(field.field_name)
+
+            name = path + attr
+            if not model_field.concrete or model_field.many_to_many:
+                # reverse FK / m2m: loaded by a prefetch, nothing to select here
+                prefetches.add(name)
+                break
+            if not model_field.is_relation or attr not in tree:
+                # plain column, or an FK that isn't joined: just its own column
+                columns.add(name)
+                break
+
+            joins.add(name)
+            if position == len(attrs) - 1:
+                # a joined FK rendered flat (pk, __str__) needs the whole row,
+                # a nested serializer only the columns it renders
+                nested = _nested_serializer(field)
+                if nested is None:
+                    columns.add(name)
+                else:
+                    _collect(nested, model_field.related_model, tree[attr], name + '__',
+                             columns, joins, prefetches)
+                break
+            current_model, tree, path = model_field.related_model, tree[attr], name + '__'
+
+
+def _lookup_path(lookup):
+    return lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+
+
+def prune_queryset(queryset, serializer, fields=None, exclude=None, required=()):
+    """
+    Narrow `queryset` to what the (already filtered) `serializer` reads.
+
+    With `fields`, columns are limited with `.only()`; with `exclude`, the
+    excluded columns are dropped with `.defer()`. Either way joins and
+    prefetches no remaining serializer field goes through are removed.
+    `required` names columns the view reads itself (e.g. a pagination cursor).
+    Returns the queryset unchanged when the serializer reads data that can't
+    be traced back to model fields.
+    """
+    if not (fields or exclude):
+        return queryset
+    select_tree = queryset.query.select_related
+    if select_tree is True:
+        return queryset
+    select_tree = select_tree or {}
+
+    model = queryset.model
+    columns, joins, prefetches = set(), set(), set()
+    try:
+        _collect(serializer, model, select_tree, '', columns, joins, prefetches,
+                 annotations=queryset.query.annotations)
+    except _Unprunable:
+        return queryset
+
+    queryset = queryset.select_related(None)
+    if joins:
+        queryset = queryset.select_related(*joins)
+
+    lookups = queryset._prefetch_related_lookups
+    kept = [lookup for lookup in lookups
+            if any(_lookup_path(lookup) == path or _lookup_path(lookup).startswith(path + '__')
+                   for path in prefetches)]
+    if len(kept) != len(lookups):
+        queryset = queryset.prefetch_related(None).prefetch_related(*kept)
+
+    local = {f.name for f in model._meta.concrete_fields}
+    if fields:
+        columns.update(name for name in required if name in local)
+        columns.add(model._meta.pk.name)
+        return queryset.only(*columns)
+
+    deferred = {f.name for f in model._meta.concrete_fields
+                if f.name not in columns and f.name not in required and not f.primary_key}
+    excluded = {name.split('.')[0] for name in exclude}
+    return queryset.defer(*(deferred & excluded)) if deferred & excluded else queryset
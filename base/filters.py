@@ -0,0 +1,22 @@
+from rest_framework import filters
+
+from .search import build_search_query
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    `?search=` backed by the model's indexed tsvector column.
+
+    Views opt in with `search_vector_field`; views without it keep the
+    default `search_fields` ILIKE behaviour.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        vector_field = getattr(view, 'search_vector_field', None)
+        if not vector_field:
+            return super().filter_queryset(request, queryset, view)
+
+        terms = request.query_params.get(self.search_param, '').strip()
+        if not terms:
+            return queryset
+        return queryset.filter(**{vector_field: build_search_query(terms)})
@@ -0,0 +1,99 @@
+"""
+WSGI / ASGI handlers that run a leaner middleware chain for the API.
+
+The JWT-authenticated APIs don't use sessions, CSRF cookies, messages or
+allauth, but MIDDLEWARE has to list those for the admin and allauth (both
+check it). These handlers build the full chain from MIDDLEWARE as usual,
+plus a second chain without API_MIDDLEWARE['SKIPPED_MIDDLEWARE'], and send
+requests whose path starts with one of API_MIDDLEWARE['PATH_PREFIXES']
+through the second one. Each chain has its own process_view /
+process_exception hooks, so skipped middleware doesn't run at all.
+"""
+from contextlib import contextmanager
+
+import django
+from django.conf import UserSettingsHolder, settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIHandler
+
+from .db import serve_requests
+
+API_MIDDLEWARE_DEFAULTS = {
+    'PATH_PREFIXES': [],
+    'SKIPPED_MIDDLEWARE': [],
+}
+
+
+def get_api_middleware_settings():
+    return {**API_MIDDLEWARE_DEFAULTS, **getattr(settings, 'API_MIDDLEWARE', {})}
+
+
+@contextmanager
+def middleware_setting(middleware):
+    """Make settings.MIDDLEWARE read `middleware` while a chain is built (startup only, not thread-safe)."""
+    original = settings._wrapped
+    override = UserSettingsHolder(original)
+    override.MIDDLEWARE = list(middleware)
+    settings._wrapped = override
+    try:
+        yield
+    finally:
+        settings._wrapped = original
+
+
+def build_handler(middleware, is_async=False):
+    """A BaseHandler whose chain is `middleware` instead of settings.MIDDLEWARE."""
+    handler = BaseHandler()
+    with middleware_setting(middleware):
+        handler.load_middleware(is_async=is_async)
+    return handler
+
+
+class APIPathDispatchMixin:
+
+    def load_middleware(self, is_async=False):
+        super().load_middleware(is_async=is_async)
+        config = get_api_middleware_settings()
+        self.api_path_prefixes = tuple(config['PATH_PREFIXES'])
+        self.api_handler = None
+        if self.api_path_prefixes:
+            skipped = set(config['SKIPPED_MIDDLEWARE'])
+            self.api_handler = build_handler(
+                [path for path in settings.MIDDLEWARE if path not in skipped], is_async=is_async
+            )
+
+    def is_api_request(self, request):
+        return self.api_handler is not None and request.path_info.startswith(self.api_path_prefixes)
+
+    def get_response(self, request):
+        if self.is_api_request(request):
+            return self.api_handler.get_response(request)
+        return super().get_response(request)
+
+    async def get_response_async(self, request):
+        if self.is_api_request(request):
+            return await self.api_handler.get_response_async(request)
+        return await super().get_response_async(request)
+
+
+class APIPathWSGIHandler(APIPathDispatchMixin, WSGIHandler):
+    pass
+
+
+class APIPathASGIHandler(APIPathDispatchMixin, ASGIHandler):
+    pass
+
+
+def get_wsgi_application():
+    """django.core.wsgi.get_wsgi_application() with the API path dispatch."""
+    django.setup(set_prefix=False)
+    serve_requests()
+    return APIPathWSGIHandler()
+
+
+def get_asgi_application():
+    """django.core.asgi.get_asgi_application() with the API path dispatch."""
+    django.setup(set_prefix=False)
+    serve_requests()
+    return APIPathASGIHandler()
@@ -0,0 +1,279 @@
+"""
+Logging that stays off the request path.
+
+- QueueHandler: the only handler request code logs through. emit() puts
+  the record on a bounded queue and returns; a background thread hands it
+  to the handlers of the `writer` logger (the console and the log file).
+  When the queue is full the record is dropped and counted rather than
+  waited on, and the writer thread reports the count.
+- RequestContextFilter: tags each record with the request id, user id and
+  the milliseconds since the request started (RequestLogMiddleware).
+- SamplingFilter: keeps a fraction of the records below WARNING per logger.
+  The decision is made per request id, so a sampled request keeps all of
+  its lines.
+- JSONFormatter: one JSON object per line.
+- SizedTimedRotatingFileHandler: rotates at an interval and when the file
+  reaches maxBytes.
+
+This module is imported while logging is configured, before the apps are
+loaded, so it must not import models.
+"""
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+import zlib
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import orjson
+from django.utils.functional import SimpleLazyObject, empty
+
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+@dataclass
+class RequestLogContext:
+    request_id: str
+    request: object = None
+    started: float = field(default_factory=time.perf_counter)
+
+
+_request_log_context = ContextVar('request_log_context', default=None)
+
+
+def start_request_log(request_id, request=None):
+    return _request_log_context.set(RequestLogContext(request_id, request))
+
+
+def end_request_log(token):
+    _request_log_context.reset(token)
+
+
+def current_request_log():
+    return _request_log_context.get()
+
+
+def _user_id(request):
+    user = getattr(request, '__dict__', {}).get('user')
+    if user is None:
+        return None
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        # the session user hasn't been loaded; don't run a query for a log line
+        return None
+    return getattr(user, 'pk', None)
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds request_id, user_id and duration_ms to records logged during a request."""
+
+    def filter(self, record):
+        context = current_request_log()
+        if context is not None:
+            if not hasattr(record, 'request_id'):
+                record.request_id = context.request_id
+            if getattr(record, 'user_id', None) is None:
+                record.user_id = _user_id(context.request)
+            record.duration_ms = round((time.perf_counter() - context.started) * 1000, 3)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps `rates[logger]` (0..1) of a logger's records below `level`; the
+    longest matching dotted prefix wins and unlisted loggers use `default`.
+    """
+
+    def __init__(self, rates=None, default=1.0, level='WARNING'):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.default = default
+        self.level = level if isinstance(level, int) else logging.getLevelName(level)
+        self._cache = {}
+
+    def rate(self, name):
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        rate, prefix = self.default, name
+        while prefix:
+            if prefix in self.rates:
+                rate = self.rates[prefix]
+                break
+            prefix = prefix.rpartition('.')[0]
+        self._cache[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= self.level:
+            return True
+        rate = self.rate(record.name)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        request_id = getattr(record, 'request_id', None)
+        if request_id is None:
+            return random.random() < rate
+        return zlib.crc32(str(request_id).encode()) / 0x100000000 < rate
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with any `extra` attributes as keys."""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc_info'] = record.exc_text
+        if record.stack_info:
+            data['stack_info'] = self.formatStack(record.stack_info)
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+class SizedTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """
+    TimedRotatingFileHandler that also rolls over once the file reaches
+    maxBytes. Files rotated within one interval get a .1, .2, ... suffix.
+    Several processes must not share one file; give each its own name.
+    """
+
+    def __init__(self, filename, when='midnight', interval=1, backupCount=0, maxBytes=0, **kwargs):
+        self.maxBytes = maxBytes
+        super().__init__(filename, when=when, interval=interval, backupCount=backupCount, **kwargs)
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.maxBytes <= 0 or not os.path.isfile(self.baseFilename):
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        return self.stream.tell() >= self.maxBytes
+
+    def rotation_filename(self, default_name):
+        name = super().rotation_filename(default_name)
+        if not os.path.exists(name):
+            return name
+        counter = 1
+        while os.path.exists(f'{name}.{counter}'):
+            counter += 1
+        return f'{name}.{counter}'
+
+    def doRollover(self):
+        rollover_at = self.rolloverAt
+        super().doRollover()
+        if time.time() < rollover_at:
+            # a size rollover keeps the time schedule
+            self.rolloverAt = rollover_at
+
+
+class _Writer(logging.handlers.QueueListener):
+
+    def __init__(self, owner, handlers):
+        super().__init__(owner.queue, *handlers, respect_handler_level=True)
+        self.owner = owner
+
+    def handle(self, record):
+        super().handle(record)
+        dropped = self.owner.take_dropped()
+        if dropped:
+            super().handle(logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': "Dropped %d log records, the logging queue was full", 'args': (dropped,),
+            }))
+
+    def enqueue_sentinel(self):
+        # may wait for room in the queue; only flush() and close() stop the writer
+        self.queue.put(self._sentinel)
+
+
+class QueueHandler(logging.Handler):
+    """
+    Puts records on a queue of `queue_size` for a writer thread that passes
+    them to the handlers of the `writer` logger. The thread starts on the
+    first record in each process, so it survives forking servers.
+
+    Not a logging.handlers.QueueHandler subclass: from Python 3.12 on,
+    dictConfig configures those with its own queue/listener protocol.
+    """
+
+    def __init__(self, writer, queue_size=10000):
+        super().__init__()
+        self.queue = queue.Queue(queue_size)
+        self.writer = writer
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._listener = None
+        self._pid = None
+
+    def _start(self):
+        with self.lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # forked: the parent's thread and queue locks don't carry over
+                self.queue = queue.Queue(self.queue_size)
+            self._listener = _Writer(self, logging.getLogger(self.writer).handlers)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Render the message now, in case the args change before the writer
+        # gets to it; the traceback is formatted by the writer.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def take_dropped(self):
+        if not self.dropped:
+            return 0
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.enqueue(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """Wait until the writer has handled everything queued so far."""
+        with self.lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+                self._pid = None
+                self._start()
+
+    def close(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = self._pid = None
+        super().close()
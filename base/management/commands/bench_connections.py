@@ -0,0 +1,102 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate request handling against the default database with fresh, "
+        "persistent and pooled connections and report per-request latency. "
+        "Each simulated request runs the connection bookkeeping Django does "
+        "at request start/finish around a few small queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="requests per worker")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--queries', type=int, default=3, help="queries per request")
+
+    def handle(self, *args, **options):
+        base = connections['default'].settings_dict
+        if base['ENGINE'] != 'django.db.backends.postgresql':
+            raise CommandError("This benchmark needs the PostgreSQL backend.")
+
+        db_options = {key: value for key, value in base['OPTIONS'].items() if key != 'pool'}
+        modes = {
+            'fresh': {'CONN_MAX_AGE': 0},
+            'persistent': {'CONN_MAX_AGE': 600},
+        }
+        if self.pool_available():
+            modes['pooled'] = {
+                'CONN_MAX_AGE': 0,
+                'OPTIONS': {**db_options, 'pool': {'min_size': options['concurrency'],
+                                                        'max_size': options['concurrency']}},
+            }
+        else:
+            self.stdout.write("psycopg_pool not installed, skipping the pooled run")
+
+        self.stdout.write(
+            f"{options['concurrency']} workers x {options['requests']} requests, {options['queries']} queries each\n"
+        )
+        self.stdout.write(f"{'mode':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for mode, overrides in modes.items():
+            settings_dict = {**base, 'OPTIONS': db_options, **overrides}
+            latencies, elapsed = self.run(settings_dict, options)
+            quantiles = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f"{mode:<12}{len(latencies) / elapsed:>10.0f}{quantiles[49] * 1000:>10.2f}"
+                f"{quantiles[94] * 1000:>10.2f}{quantiles[98] * 1000:>10.2f}"
+            )
+
+    @staticmethod
+    def pool_available():
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            return False
+        from django.db.backends.postgresql.psycopg_any import is_psycopg3
+        return is_psycopg3
+
+    def run(self, settings_dict, options):
+        backend = load_backend(settings_dict['ENGINE'])
+        latencies = []
+        lock = threading.Lock()
+        wrappers = []
+
+        def worker():
+            # private wrapper per worker; backend hooks resolve it by the 'default' alias
+            wrapper = backend.DatabaseWrapper(settings_dict, 'default')
+            with lock:
+                wrappers.append(wrapper)
+            timings = [self.request(wrapper, options['queries']) for _ in range(options['requests'])]
+            wrapper.close()
+            with lock:
+                latencies.extend(timings)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if settings_dict['OPTIONS'].get('pool'):
+            wrappers[0].close_pool()
+        return latencies, elapsed
+
+    @staticmethod
+    def request(wrapper, queries):
+        started = time.perf_counter()
+        # request_started / request_finished both call close_if_unusable_or_obsolete()
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            for _ in range(queries):
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        wrapper.close_if_unusable_or_obsolete()
+        return time.perf_counter() - started
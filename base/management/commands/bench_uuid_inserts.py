@@ -0,0 +1,77 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+from base.ids import uuid7
+
+GENERATORS = {
+    'uuid4': uuid.uuid4,
+    'uuid7': uuid7,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare insert throughput and primary key index size for uuid4 "
+        "and uuid7 keys on scratch tables shaped like BaseModel."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200_000)
+        parser.add_argument('--batch-size', type=int, default=1_000)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("This benchmark needs the PostgreSQL backend.")
+
+        rows, batch_size = options['rows'], options['batch_size']
+        self.stdout.write(f"Inserting {rows} rows in batches of {batch_size}\n")
+        self.stdout.write(f"{'generator':<10}{'rows/s':>12}{'pk index MB':>14}{'leaf density':>14}")
+
+        for name, generate in GENERATORS.items():
+            table = f'bench_pk_{name}'
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {table}')
+                cursor.execute(
+                    f'CREATE TABLE {table} (id uuid PRIMARY KEY, created_at timestamptz DEFAULT now(), '
+                    f'payload text)'
+                )
+                try:
+                    elapsed = self.insert(cursor, table, generate, rows, batch_size)
+                    index_size, density = self.index_stats(cursor, f'{table}_pkey')
+                finally:
+                    cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+            self.stdout.write(
+                f"{name:<10}{rows / elapsed:>12.0f}{index_size / 1024 / 1024:>14.1f}{density:>14}"
+            )
+
+    @staticmethod
+    def insert(cursor, table, generate, rows, batch_size):
+        payload = 'x' * 100
+        elapsed = 0.0
+        for start in range(0, rows, batch_size):
+            count = min(batch_size, rows - start)
+            params = []
+            for _ in range(count):
+                params.extend((generate(), payload))
+            sql = f'INSERT INTO {table} (id, payload) VALUES ' + ', '.join(['(%s, %s)'] * count)
+
+            started = time.perf_counter()
+            cursor.execute(sql, params)
+            elapsed += time.perf_counter() - started
+        return elapsed
+
+    @staticmethod
+    def index_stats(cursor, index):
+        cursor.execute('SELECT pg_relation_size(%s::regclass)', [index])
+        size = cursor.fetchone()[0]
+        try:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pgstattuple')
+            cursor.execute('SELECT avg_leaf_density FROM pgstatindex(%s)', [index])
+            density = f"{cursor.fetchone()[0]:.0f}%"
+        except DatabaseError:
+            density = 'n/a'
+        return size, density
@@ -0,0 +1,132 @@
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.permissions import SAFE_METHODS
+
+from .errors import QueryBudgetExceeded
+from .ids import uuid7
+from .log import end_request_log, start_request_log
+from .queries import QueryRecorder
+from .routers import choose_replica, current_routing, end_routing, get_read_replica_settings, start_routing
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger('base.requests')
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+REQUEST_ID_PATTERN = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+QUERY_BUDGET_DEFAULTS = {
+    'ENABLED': False,
+    'RAISE': False,
+    'N_PLUS_ONE_THRESHOLD': 3,
+}
+
+
+def get_query_budget_settings():
+    return {**QUERY_BUDGET_DEFAULTS, **getattr(settings, 'QUERY_BUDGET', {})}
+
+
+def get_view_query_budget(view, request):
+    """
+    Look up the budget a view declares for the current action.
+    Viewsets key `query_budget` by action, plain API views by HTTP method.
+    """
+    budgets = getattr(view, 'query_budget', None) or {}
+    action = getattr(view, 'action', None) or request.method.lower()
+    return budgets.get(action)
+
+
+class QueryBudgetMiddleware:
+    """
+    Records the SQL statements run by each request, reports the count in
+    the `X-Query-Count` header and flags N+1 patterns and budget overruns.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_query_budget_settings()
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(recorder.count)
+
+        repeated = recorder.repeated(self.config['N_PLUS_ONE_THRESHOLD'])
+        for sql, times in repeated.items():
+            logger.warning("Possible N+1 on %s %s: %d x %s", request.method, request.path, times, sql)
+
+        view = (getattr(response, 'renderer_context', None) or {}).get('view')
+        budget = get_view_query_budget(view, request) if view else None
+        if budget is not None:
+            response['X-Query-Budget'] = str(budget)
+            if recorder.count > budget:
+                message = (
+                    f"{request.method} {request.path} ran {recorder.count} queries, "
+                    f"budget is {budget}"
+                )
+                if self.config['RAISE']:
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+
+        return response
+
+
+class ReadReplicaMiddleware:
+    """
+    Chooses a replica for safe-method requests to views that opt in with
+    `read_replica = True`; everything else reads from the primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not get_read_replica_settings()['ALIASES']:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        token = start_routing()
+        try:
+            return self.get_response(request)
+        finally:
+            end_routing(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if request.method in SAFE_METHODS and getattr(view_class, 'read_replica', False):
+            current_routing().replica = choose_replica()
+
+
+class RequestLogMiddleware:
+    """
+    Gives each request an id (the caller's X-Request-ID when it looks sane)
+    that base.log stamps on every record logged while it runs, and logs one
+    line per request to `base.requests`. Goes first in MIDDLEWARE so the
+    duration covers the whole chain.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get(REQUEST_ID_HEADER, '')
+        if not REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = str(uuid7())
+        token = start_request_log(request_id, request)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            response[REQUEST_ID_HEADER] = request_id
+            request_logger.info(
+                "%s %s %s", request.method, request.path, response.status_code,
+                extra={'status_code': response.status_code,
+                       'response_ms': round((time.perf_counter() - started) * 1000, 3)},
+            )
+            return response
+        finally:
+            end_request_log(token)
@@ -1,9 +1,10 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from uuid import uuid4
+
+from .ids import uuid7
 
 class BaseModel(models.Model):
-    id=models.UUIDField(primary_key=True, default=uuid4)
+    id=models.UUIDField(primary_key=True, default=uuid7)
     created_at = models.DateTimeField(auto_now_add=True,null=True,blank=True)
     updated_at = models.DateTimeField(auto_now_add=True,null=True,blank=True)
     created_by = models.ForeignKey(to=get_user_model(),null=True,blank=True,on_delete=models.SET_NULL
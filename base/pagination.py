@@ -0,0 +1,177 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """
+    Row count estimated by the Postgres planner (EXPLAIN, no execution).
+    Works for filtered querysets too; other backends fall back to COUNT(*).
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+    plan = queryset.order_by().explain(format='json')
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class OffsetPagination(pagination.PageNumberPagination):
+    """Page number pagination used when a client asks for `?page=` or a custom `?ordering=`."""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Cursor pagination over (created_at, id), matching BaseModel ordering.
+
+    Each page is a `WHERE (created_at, id) < cursor LIMIT n` index range
+    scan, so deep pages cost the same as the first one.
+
+    Query params:
+        cursor: opaque position returned in `next` / `previous`
+        page_size: rows per page, capped at `max_page_size`
+        count: `exact` for COUNT(*), `estimate` for the planner estimate;
+               omitted by default so pages never scan the whole result
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    # Estimates below this are cheap to count exactly.
+    exact_count_threshold = 1000
+    offset_pagination_class = OffsetPagination
+
+    def __init__(self):
+        self.offset_paginator = None
+
+    def use_offset_pagination(self, request):
+        return (
+            self.offset_paginator is not None
+            or 'page' in request.query_params
+            or OrderingFilter.ordering_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_offset_pagination(request):
+            self.offset_paginator = self.offset_pagination_class()
+            return self.offset_paginator.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.count, self.count_estimated = self.get_count(queryset, request)
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = cursor[2] if cursor else False
+
+        queryset = queryset.order_by(*self.get_ordering(reverse))
+        if cursor:
+            queryset = queryset.filter(self.get_position_filter(cursor[0], cursor[1], reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = cursor is not None if not reverse else has_more
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+            payload['count_estimated'] = self.count_estimated
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count(), False
+        if mode == 'estimate':
+            estimate = estimate_count(queryset)
+            if estimate < self.exact_count_threshold:
+                return queryset.count(), False
+            return estimate, True
+        return None, False
+
+    @staticmethod
+    def get_ordering(reverse):
+        if reverse:
+            return (F('created_at').asc(nulls_first=True), F('id').asc())
+        return (F('created_at').desc(nulls_last=True), F('id').desc())
+
+    @staticmethod
+    def get_position_filter(created_at, pk, reverse):
+        """Rows strictly after the cursor in the requested direction (NULL created_at sorts last)."""
+        if not reverse:
+            if created_at is None:
+                return Q(created_at__isnull=True, id__lt=pk)
+            return (Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                    | Q(created_at__isnull=True))
+        if created_at is None:
+            return Q(created_at__isnull=False) | Q(created_at__isnull=True, id__gt=pk)
+        return Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+
+    def encode_cursor(self, instance, reverse):
+        created_at = instance.created_at.isoformat() if instance.created_at else None
+        position = json.dumps({'c': created_at, 'i': str(instance.pk), 'r': int(reverse)})
+        cursor = base64.urlsafe_b64encode(position.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            created_at = parse_datetime(position['c']) if position['c'] else None
+            pk = model._meta.pk.to_python(position['i'])
+            return created_at, pk, bool(position['r'])
+        except (binascii.Error, ValueError, KeyError, TypeError, ValidationError):
+            raise NotFound('Invalid cursor')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
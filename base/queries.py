@@ -0,0 +1,68 @@
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+# Transaction control statements carry no data access and are not counted.
+TRANSACTION_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT', 'BEGIN', 'COMMIT', 'ROLLBACK')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?|\$\d+')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    Normalize a SQL statement so that statements differing only in
+    parameters share the same fingerprint.
+
+    Example:
+        'SELECT ... WHERE "id" IN (%s, %s, %s) LIMIT 21'
+        -> 'SELECT ... WHERE "id" IN (?) LIMIT ?'
+    """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('IN (?)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """
+    Records every SQL statement executed while `record()` is active.
+    Used by QueryBudgetMiddleware at runtime and by the test harness.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def record(self, using=None):
+        aliases = [using] if using else list(connections)
+        with ExitStack() as stack:
+            for alias in aliases:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            yield self
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated(self, threshold):
+        """
+        Return fingerprints executed at least `threshold` times, the
+        signature of an N+1 access pattern.
+
+        Returns:
+            dict: {fingerprint: times executed}
+        """
+        counts = Counter(fingerprint(sql) for sql in self.queries)
+        return {sql: times for sql, times in counts.items() if times >= threshold}
@@ -0,0 +1,58 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to DRF's stdlib encoder
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+# DRF's encoder covers what orjson doesn't natively: Decimal, lazy strings, timedelta, querysets...
+_fallback = JSONEncoder().default
+
+
+def dumps(data, indent=False):
+    """
+    JSON-encode `data` to bytes. UUIDs, dates and datetimes are encoded
+    natively (aware UTC datetimes as `...Z`, matching DRF's DateTimeField).
+    """
+    if orjson is None:
+        return json.dumps(data, cls=JSONEncoder, indent=2 if indent else None,
+                          separators=None if indent else (',', ':'), ensure_ascii=False).encode()
+    options = ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else ORJSON_OPTIONS
+    return orjson.dumps(data, default=_fallback, option=options)
+
+
+def stream_json_array(chunks):
+    """
+    Yield a JSON array piece by piece from an iterable of lists of items,
+    so only one chunk is encoded and held in memory at a time.
+    """
+    yield b'['
+    first = True
+    for chunk in chunks:
+        body = dumps(list(chunk))[1:-1]
+        if not body:
+            continue
+        if not first:
+            yield b','
+        yield body
+        first = False
+    yield b']'
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson. The `indent` media type parameter (and
+    the browsable API) get orjson's two-space indentation.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        return dumps(data, indent=bool(indent))
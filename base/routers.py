@@ -0,0 +1,114 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+READ_REPLICA_DEFAULTS = {
+    'ALIASES': [],
+    # replicas further behind than this are skipped
+    'MAX_LAG_SECONDS': 5,
+    # how long a replica's measured lag is trusted before it's checked again
+    'LAG_CHECK_INTERVAL': 2,
+}
+
+REPLICA_LAG_SQL = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def get_read_replica_settings():
+    return {**READ_REPLICA_DEFAULTS, **getattr(settings, 'READ_REPLICAS', {})}
+
+
+@dataclass
+class RoutingState:
+    """Per-request routing: the replica chosen for reads, and whether anything was written yet."""
+    replica: str = None
+    wrote: bool = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def start_routing(replica=None):
+    return _state.set(RoutingState(replica=replica))
+
+
+def end_routing(token):
+    _state.reset(token)
+
+
+def current_routing():
+    return _state.get()
+
+
+_lag = {}
+
+
+def replica_lag(alias):
+    """
+    Seconds `alias` is behind the primary, cached for LAG_CHECK_INTERVAL.
+    None if the replica can't be reached. Non-Postgres aliases (SQLite
+    stand-ins in tests) report no lag.
+    """
+    now = time.monotonic()
+    checked_at, lag = _lag.get(alias, (None, None))
+    if checked_at is not None and now - checked_at < get_read_replica_settings()['LAG_CHECK_INTERVAL']:
+        return lag
+
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        lag = 0.0
+    else:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(REPLICA_LAG_SQL)
+                row = cursor.fetchone()
+            lag = float(row[0] or 0)
+        except DatabaseError:
+            lag = None
+    _lag[alias] = (now, lag)
+    return lag
+
+
+def choose_replica():
+    """Least lagged replica within MAX_LAG_SECONDS, or None to read from the primary."""
+    config = get_read_replica_settings()
+    candidates = []
+    for alias in config['ALIASES']:
+        lag = replica_lag(alias)
+        if lag is not None and lag <= config['MAX_LAG_SECONDS']:
+            candidates.append((lag, alias))
+    return min(candidates)[1] if candidates else None
+
+
+class ReadReplicaRouter:
+    """
+    Sends reads to the replica chosen for the current request (see
+    ReadReplicaMiddleware). Writes always go to the primary, and once a
+    request has written, its later reads do too.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = current_routing()
+        if state is None or state.replica is None:
+            return None
+        return DEFAULT_DB_ALIAS if state.wrote else state.replica
+
+    def db_for_write(self, model, **hints):
+        state = current_routing()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_read_replica_settings()['ALIASES']:
+            return False
+        return None
@@ -0,0 +1,36 @@
+import operator
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery, SearchVector, SearchVectorField
+from django.db import models
+
+# Text search configuration used both for the stored vectors and for queries;
+# they must match for the GIN indexes to be used.
+SEARCH_CONFIG = 'english'
+
+
+def search_vector_field(*weighted_fields):
+    """
+    Build a stored generated tsvector column over the given fields.
+    Postgres recomputes it on every INSERT/UPDATE, so it never goes stale.
+
+    Args:
+        weighted_fields: (field_name, weight) pairs, weight in 'A'..'D'
+
+    Example:
+        search_vector = search_vector_field(('title', 'A'), ('description', 'B'))
+    """
+    vector = reduce(operator.add, (
+        SearchVector(field_name, weight=weight, config=SEARCH_CONFIG)
+        for field_name, weight in weighted_fields
+    ))
+    return models.GeneratedField(
+        expression=vector,
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+
+def build_search_query(text):
+    """Parse user input with websearch syntax ("quoted phrases", -exclusions, OR)."""
+    return SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
@@ -1,12 +1,12 @@
 # serializers.py
 from rest_framework import serializers
-import uuid
 from django.db import models
 from django.core.exceptions import ObjectDoesNotExist
 from rest_framework.exceptions import ValidationError
 
 from . import errors
 from .errors import PMValidationError, PMDataIntegrityException
+from .ids import uuid7
 
 
 
@@ -31,6 +31,21 @@ class BaseSerializer(serializers.Serializer):
 
         super().__init__(*args, **kwargs)
 
+        self._apply_field_filtering()
+
+    def check_url_parent(self, value, **url_kwargs):
+        """
+        Reject a parent object given in the body that isn't the one the nested
+        URL points at. `url_kwargs` maps attributes of `value` to URL kwargs,
+        e.g. check_url_parent(story, pk='story_pk', project_id='project_pk').
+        """
+        view_kwargs = getattr(self.context.get('view'), 'kwargs', {})
+        for attribute, url_kwarg in url_kwargs.items():
+            expected = view_kwargs.get(url_kwarg)
+            if expected is not None and str(getattr(value, attribute)).lower() != str(expected).lower():
+                raise serializers.ValidationError("Does not belong to the resource in the URL.")
+        return value
+
     @staticmethod
     def extract_nested_fields(fields_list):
         """
@@ -76,6 +91,35 @@ class BaseSerializer(serializers.Serializer):
         return result
 
 
+    def _apply_field_filtering(self):
+        """
+        Drop fields according to the allowed/removed maps and the audit flag.
+        Nested paths ('story.title') are applied to nested serializers.
+        """
+        if not (self._allowed_fields_map or self._removed_fields_map or self._remove_audit):
+            return
+
+        fields = self.fields
+
+        if self._allowed_fields_map:
+            for field_name in list(fields.keys()):
+                if field_name not in self._allowed_fields_map:
+                    fields.pop(field_name)
+                elif self._allowed_fields_map[field_name]:
+                    self._apply_nested_filtering(fields[field_name], self._allowed_fields_map[field_name])
+
+        for field_name, inner_map in self._removed_fields_map.items():
+            if field_name not in fields:
+                continue
+            if inner_map:
+                self._remove_nested_fields(fields[field_name], inner_map)
+            else:
+                fields.pop(field_name)
+
+        if self._remove_audit:
+            for field_name in self.AUDIT_FIELDS:
+                fields.pop(field_name, None)
+
     def _apply_nested_filtering(self, field, nested_map):
         """
         Apply filtering to nested serializer fields.
@@ -88,34 +132,28 @@ class BaseSerializer(serializers.Serializer):
         if isinstance(field, serializers.ListSerializer):
             child = field.child
             if isinstance(child, serializers.BaseSerializer):
-                # Create a new serializer class with filtered fields
-                self._create_filtered_serializer(child, nested_map, field)
+                self._create_filtered_serializer(child, nested_map)
 
         # Handle regular nested serializer
         elif isinstance(field, serializers.BaseSerializer):
             self._create_filtered_serializer(field, nested_map)
 
-    def _create_filtered_serializer(self, serializer, nested_map, parent_field=None):
+    def _create_filtered_serializer(self, serializer, nested_map):
         """
-        Create a filtered version of a nested serializer.
+        Restrict a nested serializer to the fields in nested_map.
+
+        The nested serializer is this serializer's own (deep-copied) field
+        instance, so it is filtered in place.
 
         Args:
             serializer: The nested serializer to filter
             nested_map (dict): Fields to include in the nested serializer
-            parent_field: Parent field (for ListSerializer)
         """
-        # Create a new serializer class that filters its fields
-        class FilteredSerializer(serializer.__class__):
-            def __init__(self, *args, **kwargs):
-                # Don't pass filtering kwargs to avoid infinite recursion
-                kwargs.pop('allowed_fields', None)
-                kwargs.pop('removed_fields', None)
-                kwargs.pop('remove_audit', None)
-                super().__init__(*args, **kwargs)
-
-                # Apply field filtering to this nested serializer
-                self._filter_nested_fields(nested_map)
-
+        for field_name in list(serializer.fields.keys()):
+            if field_name not in nested_map:
+                serializer.fields.pop(field_name)
+            elif nested_map[field_name]:
+                self._apply_nested_filtering(serializer.fields[field_name], nested_map[field_name])
 
     def _remove_nested_fields(self, field, nested_map):
         """
@@ -143,33 +181,14 @@ class BaseSerializer(serializers.Serializer):
             serializer: Nested serializer
             nested_map (dict): Fields to remove
         """
-        # Remove top-level fields in nested serializer
-        for field_name in nested_map.keys():
-            if field_name in serializer.fields:
-                serializer.fields.pop(field_name, None)
-
         for field_name, inner_map in nested_map.items():
-            if inner_map and field_name in serializer.fields:
-                nested_field = serializer.fields[field_name]
-                if isinstance(nested_field, serializers.BaseSerializer):
-                    self._remove_from_nested_serializer(nested_field, inner_map)
-                elif (isinstance(nested_field, serializers.ListSerializer) and
-                      isinstance(nested_field.child, serializers.BaseSerializer)):
-                    self._remove_from_nested_serializer(nested_field.child, inner_map)
-
-
-    def to_representation(self, instance):
-        """
-        Override to ensure filtered fields work correctly.
-        """
-        representation = super().to_representation(instance)
-
-        # Convert UUID fields to string for JSON serialization
-        for key, value in representation.items():
-            if isinstance(value, uuid.UUID):
-                representation[key] = str(value)
+            if field_name not in serializer.fields:
+                continue
+            if inner_map:
+                self._remove_nested_fields(serializer.fields[field_name], inner_map)
+            else:
+                serializer.fields.pop(field_name)
 
-        return representation
 
 class BaseModelSerializer(serializers.ModelSerializer, BaseSerializer):
     """
@@ -185,7 +204,7 @@ class BaseModelSerializer(serializers.ModelSerializer, BaseSerializer):
 
     id = serializers.UUIDField(
         read_only=True,
-        default=uuid.uuid4,
+        default=uuid7,
         help_text="Unique record identifier"
     )
     is_active = serializers.BooleanField(
@@ -259,13 +278,8 @@ class BaseModelSerializer(serializers.ModelSerializer, BaseSerializer):
         )
         self._remove_audit = self._filter_kwargs['remove_audit']
 
-        # Apply field filtering
-
-
-        # Remove audit fields if requested
-
+        self._apply_field_filtering()
 
-   
 
     def __get_unique_fields(self):
         """
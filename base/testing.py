@@ -0,0 +1,44 @@
+from contextlib import contextmanager
+
+from rest_framework.test import APITestCase
+
+from users.tokens import UserRefreshToken
+
+from .middleware import get_query_budget_settings
+from .queries import QueryRecorder
+
+
+class QueryBudgetTestCase(APITestCase):
+    """
+    API test case that checks requests against the `query_budget`
+    declared on the viewset handling them.
+    """
+
+    def authenticate(self, user):
+        token = UserRefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    @contextmanager
+    def assertQueryBudget(self, viewset, action, threshold=None):
+        """
+        Fail if the wrapped block runs more queries than the viewset
+        declares for `action`, or repeats a statement `threshold` times.
+        """
+        if threshold is None:
+            threshold = get_query_budget_settings()['N_PLUS_ONE_THRESHOLD']
+        budget = viewset.query_budget[action]
+
+        recorder = QueryRecorder()
+        with recorder.record():
+            yield recorder
+
+        executed = '\n'.join(recorder.queries)
+        self.assertLessEqual(
+            recorder.count, budget,
+            f"{viewset.__name__}.{action} ran {recorder.count} queries, budget is {budget}:\n{executed}"
+        )
+        repeated = recorder.repeated(threshold)
+        self.assertFalse(
+            repeated,
+            f"{viewset.__name__}.{action} repeats statements (N+1): {repeated}"
+        )
@@ -1,3 +1,445 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import copy
+import logging
+import logging.config
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve
+from django.utils import timezone
+
+from misc.models import Country
+from .ids import uuid7
+from .handlers import APIPathWSGIHandler
+from .log import JSONFormatter, QueueHandler, RequestContextFilter, SamplingFilter, SizedTimedRotatingFileHandler
+from .pagination import KeysetPagination, estimate_count
+from .parsers import ORJSONParser
+from . import db, routers
+from .middleware import ReadReplicaMiddleware, RequestLogMiddleware
+from .queries import QueryRecorder, fingerprint
+from .renderers import ORJSONRenderer, stream_json_array
+from .testing import QueryBudgetTestCase
+from .views import iter_routed_viewsets
+
+User = get_user_model()
+
+
+class UUID7Tests(SimpleTestCase):
+
+    def test_version_and_variant(self):
+        value = uuid7()
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, 'specified in RFC 4122')
+
+    def test_ids_are_strictly_increasing(self):
+        ids = [uuid7() for _ in range(10_000)]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+
+
+class FingerprintTests(SimpleTestCase):
+
+    def test_parameters_are_normalized(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "Tickets" WHERE "id" = %s LIMIT 21'),
+            fingerprint('SELECT * FROM "Tickets" WHERE "id" = %s LIMIT 1'),
+        )
+
+    def test_in_lists_of_any_length_match(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "Tickets" WHERE "id" IN (%s, %s, %s)'),
+            fingerprint('SELECT * FROM "Tickets" WHERE "id" IN (%s)'),
+        )
+
+    def test_literals_are_normalized(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM \"Tickets\" WHERE \"status\" = 'todo'"),
+            fingerprint("SELECT * FROM \"Tickets\" WHERE \"status\" = 'done'"),
+        )
+
+
+class ORJSONTests(SimpleTestCase):
+
+    def test_native_types(self):
+        value = uuid7()
+        data = {'id': value, 'day': date(2026, 1, 2), 'at': datetime(2026, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc),
+                'amount': Decimal('1.50')}
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), {
+            'id': str(value), 'day': '2026-01-02', 'at': '2026-01-02T03:04:05Z', 'amount': 1.5,
+        })
+
+    def test_parser_round_trip(self):
+        body = ORJSONRenderer().render({'title': 'Ünïcode', 'ids': [1, 2]})
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), {'title': 'Ünïcode', 'ids': [1, 2]})
+
+    def test_stream_json_array(self):
+        chunks = [[{'n': 1}, {'n': 2}], [], [{'n': 3}]]
+        self.assertEqual(json.loads(b''.join(stream_json_array(chunks))), [{'n': 1}, {'n': 2}, {'n': 3}])
+        self.assertEqual(b''.join(stream_json_array([])), b'[]')
+
+
+class QueryRecorderTests(TestCase):
+
+    def test_repeated_statements_are_flagged(self):
+        users = [User.objects.create_user(f'user{i}') for i in range(3)]
+        recorder = QueryRecorder()
+        with recorder.record():
+            for user in users:
+                User.objects.get(pk=user.pk)
+        self.assertEqual(recorder.count, 3)
+        self.assertEqual(list(recorder.repeated(3).values()), [3])
+        self.assertFalse(recorder.repeated(4))
+
+
+class QueryBudgetDeclarationTests(SimpleTestCase):
+
+    def test_every_routed_action_declares_a_budget(self):
+        for viewset, actions in iter_routed_viewsets():
+            budgets = getattr(viewset, 'query_budget', {})
+            for action in actions:
+                self.assertIn(action, budgets, f"{viewset.__name__} has no query budget for '{action}'")
+
+
+@override_settings(QUERY_BUDGET={'ENABLED': True})
+class QueryBudgetMiddlewareTests(TestCase):
+
+    def test_query_count_headers(self):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        user = User.objects.create_user('middleware')
+        token = RefreshToken.for_user(user).access_token
+        response = self.client.get('/misc/countries/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-Query-Count', response)
+        self.assertEqual(response['X-Query-Budget'], '2')
+
+
+class DatabaseConnectionStatsTests(QueryBudgetTestCase):
+
+    def test_staff_only(self):
+        self.authenticate(User.objects.create_user('not-staff'))
+        self.assertEqual(self.client.get('/monitoring/db/').status_code, 403)
+
+    def test_stats(self):
+        self.authenticate(User.objects.create_user('staff', is_staff=True))
+        response = self.client.get('/monitoring/db/')
+        self.assertEqual(response.status_code, 200)
+        stats = response.data[0]
+        self.assertEqual(stats['alias'], 'default')
+        self.assertTrue(stats['health_checks'])
+        self.assertIn('pool' if stats['pooled'] else 'connection_open', stats)
+
+
+class StatementTimeoutTests(TestCase):
+
+    def current_timeout(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW statement_timeout')
+            return cursor.fetchone()[0]
+
+    def apply(self, serving):
+        db.serve_requests(serving)
+        self.addCleanup(db.serve_requests, False)
+        db.apply_statement_timeout(connection)
+
+    @override_settings(STATEMENT_TIMEOUT={'REQUEST_MS': 1500, 'COMMAND_MS': 0})
+    def test_request_connections_are_capped(self):
+        # the test's transaction rollback also undoes the SET
+        self.apply(serving=True)
+        self.assertEqual(self.current_timeout(), '1500ms')
+
+    @override_settings(STATEMENT_TIMEOUT={'REQUEST_MS': 1500, 'COMMAND_MS': 0})
+    def test_commands_run_unbounded(self):
+        original = self.current_timeout()
+        self.apply(serving=False)
+        self.assertEqual(self.current_timeout(), original)
+
+
+class APIPathMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.handler = APIPathWSGIHandler()
+        self.factory = RequestFactory()
+
+    def test_api_paths_skip_browser_middleware(self):
+        request = self.factory.post('/users/token/verify/', {'token': 'not-a-token'},
+                                    content_type='application/json')
+        self.assertTrue(self.handler.is_api_request(request))
+        response = self.handler.get_response(request)
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn('X-Frame-Options', response)
+        self.assertFalse(hasattr(request, 'session'))
+
+    def test_other_paths_keep_the_full_chain(self):
+        request = self.factory.get('/admin/login/')
+        self.assertFalse(self.handler.is_api_request(request))
+        response = self.handler.get_response(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+        self.assertTrue(hasattr(request, 'session'))
+        self.assertIn('csrftoken', response.cookies)
+
+    @override_settings(API_MIDDLEWARE={'PATH_PREFIXES': []})
+    def test_no_prefixes_disables_the_dispatch(self):
+        handler = APIPathWSGIHandler()
+        self.assertIsNone(handler.api_handler)
+        response = handler.get_response(self.factory.get('/misc/nothing-here/'))
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+
+
+class StructuredLoggingTests(SimpleTestCase):
+
+    def capture(self, name, *filters):
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(JSONFormatter())
+        for log_filter in filters:
+            handler.addFilter(log_filter)
+        logger = logging.getLogger(name)
+        logger.addHandler(handler)
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        self.addCleanup(logger.removeHandler, handler)
+        return logger, stream
+
+    def records(self, stream):
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    def test_records_carry_request_context(self):
+        logger, stream = self.capture('base.tests.context', RequestContextFilter())
+        request = RequestFactory().get('/misc/countries/', HTTP_X_REQUEST_ID='req-1')
+        request.user = User(pk=7)
+
+        def view(request):
+            logger.info("handled %s", request.path, extra={'items': 3})
+            return HttpResponse()
+
+        response = RequestLogMiddleware(view)(request)
+        logger.info("outside a request")
+
+        inside, outside = self.records(stream)
+        self.assertEqual(response['X-Request-ID'], 'req-1')
+        self.assertEqual(inside['message'], 'handled /misc/countries/')
+        self.assertEqual((inside['request_id'], inside['user_id'], inside['items']), ('req-1', 7, 3))
+        self.assertGreaterEqual(inside['duration_ms'], 0)
+        self.assertNotIn('request_id', outside)
+
+    def test_invalid_request_ids_are_replaced(self):
+        request = RequestFactory().get('/', HTTP_X_REQUEST_ID='bad id\n')
+        response = RequestLogMiddleware(lambda request: HttpResponse())(request)
+        self.assertEqual(len(response['X-Request-ID']), 36)
+
+    def test_sampling(self):
+        sampling = SamplingFilter(rates={'noisy': 0, 'half': 0.5})
+        record = lambda name, level=logging.INFO, **extra: logging.makeLogRecord(
+            {'name': name, 'levelno': level, **extra})
+
+        self.assertFalse(sampling.filter(record('noisy.child')))
+        self.assertTrue(sampling.filter(record('noisy.child', logging.WARNING)))
+        self.assertTrue(sampling.filter(record('quiet')))
+        for request_id in map(str, range(20)):
+            first = sampling.filter(record('half', request_id=request_id))
+            self.assertEqual(sampling.filter(record('half.child', request_id=request_id)), first)
+
+    def test_queue_handler_drops_instead_of_blocking(self):
+        release = threading.Event()
+        written = []
+
+        class SlowHandler(logging.Handler):
+            def emit(self, record):
+                release.wait(5)
+                written.append(record.getMessage())
+
+        writer = logging.getLogger('base.tests.writer')
+        slow = SlowHandler()
+        writer.addHandler(slow)
+        self.addCleanup(writer.removeHandler, slow)
+        handler = QueueHandler('base.tests.writer', queue_size=2)
+        self.addCleanup(handler.close)
+        logger = logging.getLogger('base.tests.queue')
+        logger.addHandler(handler)
+        logger.propagate = False
+        self.addCleanup(logger.removeHandler, handler)
+
+        started = time.perf_counter()
+        for number in range(10):
+            logger.warning("record %d", number)
+        self.assertLess(time.perf_counter() - started, 1)
+
+        release.set()
+        handler.flush()
+        dropped = [message for message in written if message.startswith('Dropped')]
+        self.assertEqual(len(dropped), 1)
+        kept = [message for message in written if message.startswith('record')]
+        self.assertEqual(len(kept) + int(dropped[0].split()[1]), 10)
+        self.assertEqual(kept[0], 'record 0')
+
+    def test_project_logging_config(self):
+        from PMS import settings as project_settings
+
+        config = copy.deepcopy(project_settings.LOGGING)
+        path = os.path.join(tempfile.mkdtemp(), 'app.log')
+        config['handlers']['file']['filename'] = path
+        config['loggers']['base.log.writer']['handlers'] = ['file']
+        root, writer = logging.getLogger(), logging.getLogger('base.log.writer')
+        saved = root.handlers[:], root.level, writer.handlers[:], writer.propagate
+        try:
+            logging.config.dictConfig(config)
+            handler, = root.handlers
+            self.assertIsInstance(handler, QueueHandler)
+            logging.getLogger('base.tests.config').warning("configured")
+            handler.flush()
+            handler.close()
+            for target in writer.handlers:
+                target.close()
+        finally:
+            root.handlers, root.level, writer.handlers, writer.propagate = saved
+
+        with open(path) as log_file:
+            self.assertEqual(json.loads(log_file.readline())['message'], 'configured')
+
+    def test_size_rotation(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'app.log')
+        handler = SizedTimedRotatingFileHandler(path, maxBytes=100, backupCount=2)
+        self.addCleanup(handler.close)
+        rollover_at = handler.rolloverAt
+        for number in range(40):
+            handler.emit(logging.makeLogRecord({'msg': f'line {number:02}'}))
+
+        rotated = sorted(name for name in os.listdir(directory) if name != 'app.log')
+        self.assertEqual(len(rotated), 2)
+        self.assertTrue(all(name.startswith('app.log.') for name in rotated))
+        self.assertEqual(handler.rolloverAt, rollover_at)
+        with open(path) as log_file:
+            self.assertIn('line 39', log_file.read())
+
+
+@override_settings(READ_REPLICAS={'ALIASES': ['replica1', 'replica2'], 'MAX_LAG_SECONDS': 5,
+                                  'LAG_CHECK_INTERVAL': 60})
+class ReadReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = routers.ReadReplicaRouter()
+        self.set_lag(replica1=1.0, replica2=0.5)
+
+    def tearDown(self):
+        routers._lag.clear()
+
+    def set_lag(self, **lags):
+        now = time.monotonic()
+        routers._lag.update({alias: (now, lag) for alias, lag in lags.items()})
+
+    def routed_replica(self, method, path):
+        request = getattr(RequestFactory(), method)(path)
+        seen = {}
+
+        def get_response(request):
+            middleware.process_view(request, resolve(path).func, (), {})
+            seen['replica'] = routers.current_routing().replica
+            seen['read'] = self.router.db_for_read(Country)
+
+        middleware = ReadReplicaMiddleware(get_response)
+        middleware(request)
+        return seen
+
+    def test_reads_stay_on_primary_after_a_write(self):
+        token = routers.start_routing(replica='replica1')
+        try:
+            self.assertEqual(self.router.db_for_read(Country), 'replica1')
+            self.assertEqual(self.router.db_for_write(Country), 'default')
+            self.assertEqual(self.router.db_for_read(Country), 'default')
+        finally:
+            routers.end_routing(token)
+        self.assertIsNone(self.router.db_for_read(Country))
+
+    def test_lag_guard(self):
+        self.assertEqual(routers.choose_replica(), 'replica2')
+        self.set_lag(replica2=30.0)
+        self.assertEqual(routers.choose_replica(), 'replica1')
+        self.set_lag(replica1=None)
+        self.assertIsNone(routers.choose_replica())
+
+    def test_only_safe_requests_to_opted_in_views(self):
+        tickets = f'/tickets/projects/{uuid7()}/stories/{uuid7()}/tickets/'
+        self.assertEqual(self.routed_replica('get', tickets), {'replica': 'replica2', 'read': 'replica2'})
+        self.assertEqual(self.routed_replica('post', tickets), {'replica': None, 'read': None})
+        self.assertEqual(self.routed_replica('get', '/misc/countries/'), {'replica': None, 'read': None})
+        self.assertFalse(self.router.allow_migrate('replica1', 'tickets'))
+
+
+class KeysetPaginationTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.authenticate(User.objects.create_user('pager'))
+        for i in range(7):
+            Country.objects.create(name=f'COUNTRY{i}', code=f'C{i}')
+        # Ties on created_at must still paginate deterministically by id.
+        Country.objects.filter(name__in=['COUNTRY2', 'COUNTRY3', 'COUNTRY4']).update(created_at=timezone.now())
+
+    def walk(self, url, key):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['name'] for row in response.data['results'])
+            url = response.data[key]
+        return seen, response
+
+    def test_pages_cover_every_row_once_in_both_directions(self):
+        forward, last_page = self.walk('/misc/countries/?page_size=2', 'next')
+        self.assertEqual(sorted(forward), sorted(Country.objects.values_list('name', flat=True)))
+        self.assertEqual(len(forward), len(set(forward)))
+
+        previous = last_page.data['previous']
+        backward, _ = self.walk(previous, 'previous')
+        expected = forward[:-len(last_page.data['results'])]
+        self.assertEqual(sorted(backward), sorted(expected))
+
+    def test_order_matches_created_at_then_id(self):
+        forward, _ = self.walk('/misc/countries/?page_size=3', 'next')
+        expected = Country.objects.order_by('-created_at', '-id').values_list('name', flat=True)
+        self.assertEqual(forward, list(expected))
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(f'/misc/countries/?page_size={KeysetPagination.max_page_size + 1}')
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertNotIn('count', response.data)
+
+    def test_exact_and_estimated_counts(self):
+        response = self.client.get('/misc/countries/', {'count': 'exact'})
+        self.assertEqual(response.data['count'], 7)
+        self.assertFalse(response.data['count_estimated'])
+
+        # Small estimates are replaced by an exact count.
+        response = self.client.get('/misc/countries/', {'count': 'estimate'})
+        self.assertEqual(response.data['count'], 7)
+
+    def test_estimate_count_reads_the_planner(self):
+        self.assertIsInstance(estimate_count(Country.objects.filter(code='C1')), int)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/misc/countries/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+        position = json.dumps({'c': None, 'i': 'not-a-uuid', 'r': 0})
+        cursor = base64.urlsafe_b64encode(position.encode()).decode()
+        response = self.client.get('/misc/countries/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+    def test_ordering_param_falls_back_to_page_numbers(self):
+        response = self.client.get('/misc/countries/', {'ordering': 'name', 'page': 2, 'page_size': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual([row['name'] for row in response.data['results']], ['COUNTRY5', 'COUNTRY6'])
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import DatabaseConnectionStatsView
+
+urlpatterns = [
+    path('db/', DatabaseConnectionStatsView.as_view(), name='db-connection-stats'),
+]
@@ -1,15 +1,65 @@
+import hashlib
+from urllib.parse import urlencode
+
 from django.shortcuts import render
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
-from django.http import Http404
-from rest_framework import viewsets,status,filters
+from django.http import Http404, StreamingHttpResponse
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework import viewsets,status,filters,permissions
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 
+from .cache import get_cache_version, response_cache_key
+from .compiled import compile_read_plan
+from .db import connection_stats
+from .fieldsets import parse_field_list, prune_queryset
+from .filters import FullTextSearchFilter
+from .renderers import stream_json_array
+from .serializers import BaseSerializer
+
 class BaseViewSet(viewsets.GenericViewSet):
     ordering = ('-created_at',)
-    filter_backends = [DjangoFilterBackend,filters.SearchFilter,filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend,FullTextSearchFilter,filters.OrderingFilter]
+    # Maximum SQL queries per action, enforced by QueryBudgetMiddleware and the tests.
+    query_budget = {}
+    # Read from a replica on safe-method requests (base.routers.ReadReplicaRouter).
+    read_replica = False
+    # Columns read outside the serializer (the keyset pagination cursor); always
+    # loaded, whatever ?fields= asks for.
+    field_selection_required = ('created_at',)
+
+    def get_field_selection(self):
+        """
+        `?fields=` / `?exclude=` as lists of (dotted) serializer field names.
+        Only honoured on reads, and only for BaseSerializer subclasses (write
+        serializers need all their fields).
+        """
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return [], []
+        if not issubclass(self.get_serializer_class(), BaseSerializer):
+            return [], []
+        params = request.query_params
+        return parse_field_list(params.get('fields')), parse_field_list(params.get('exclude'))
+
+    def get_serializer(self, *args, **kwargs):
+        fields, exclude = self.get_field_selection()
+        if fields:
+            kwargs.setdefault('allowed_fields', fields)
+        if exclude:
+            kwargs.setdefault('removed_fields', exclude)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, exclude = self.get_field_selection()
+        if not (fields or exclude):
+            return queryset
+        return prune_queryset(queryset, self.get_serializer(), fields, exclude, self.field_selection_required)
     
     
     def perform_create(self, serializer):
@@ -19,5 +69,131 @@ class BaseViewSet(viewsets.GenericViewSet):
 
     def perform_update(self,serializer):
         serializer.save(updated_by=self.request.user)
-        
-        
\ No newline at end of file
+
+
+class CompiledListMixin:
+    """
+    Opt-in fast path for `list`: rows are read with `.values_list()` and
+    rendered by a compiled plan of the read serializer (see base.compiled).
+    Serializers that can't be compiled, and requests using ?fields= /
+    ?exclude=, go through the serializer as usual.
+
+    `?stream=true` skips pagination and streams the whole filtered list as a
+    JSON array, rendered `stream_chunk_size` rows at a time (exports).
+    """
+    stream_query_param = 'stream'
+    stream_chunk_size = 2000
+
+    def get_read_plan(self, queryset):
+        fields, exclude = self.get_field_selection()
+        if fields or exclude:
+            return None
+        return compile_read_plan(self.get_serializer_class(), queryset)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = self.get_read_plan(queryset)
+        if plan is not None:
+            queryset = plan.values(queryset)
+
+        if request.query_params.get(self.stream_query_param) in ('1', 'true'):
+            return self.stream_list(queryset, plan)
+
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        if plan is not None:
+            data = plan.render(rows)
+        else:
+            data = self.get_serializer(rows, many=True).data
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def stream_list(self, queryset, plan):
+        if plan is not None:
+            render_rows = plan.render
+        else:
+            render_rows = lambda rows: self.get_serializer(rows, many=True).data
+
+        def chunks():
+            rows = []
+            for row in queryset.iterator(chunk_size=self.stream_chunk_size):
+                rows.append(row)
+                if len(rows) == self.stream_chunk_size:
+                    yield render_rows(rows)
+                    rows = []
+            if rows:
+                yield render_rows(rows)
+
+        return StreamingHttpResponse(stream_json_array(chunks()), content_type='application/json')
+
+
+class CachedResponseMixin:
+    """
+    Caches `list` / `retrieve` responses for rarely changing data under a
+    versioned key: bumping the version of `cache_group` (from model signals,
+    see base.cache) invalidates them all. Responses carry an ETag so repeat
+    loads can be answered with 304 Not Modified.
+    """
+    cache_group = None
+    cache_timeout = 60 * 60 * 24
+    # how long clients may reuse a response without revalidating
+    cache_max_age = 60
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_url(self, request):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        return request.build_absolute_uri(request.path) + ('?' + query if query else '')
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        version = get_cache_version(self.cache_group)
+        key = response_cache_key(self.cache_group, version, self.get_cache_url(request))
+        etag = '"%s"' % hashlib.sha1(key.encode()).hexdigest()[:20]
+        headers = {'ETag': etag, 'Cache-Control': f'private, max-age={self.cache_max_age}'}
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = cache.get(key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if not isinstance(response, Response) or response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(key, data, self.cache_timeout)
+        return Response(data, headers=headers)
+
+
+class DatabaseConnectionStatsView(APIView):
+    """Pool / persistent connection statistics for every configured database (staff only)."""
+
+    permission_classes = [permissions.IsAdminUser]
+    query_budget = {'get': 1}
+
+    def get(self, request):
+        return Response([connection_stats(alias) for alias in settings.DATABASES])
+
+
+def iter_routed_viewsets(patterns=None):
+    """
+    Yield (viewset class, actions) for every viewset reachable from the
+    root URLconf. Actions are the viewset methods the route dispatches to.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_routed_viewsets(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            callback = pattern.callback
+            actions = getattr(callback, 'actions', None)
+            if actions:
+                yield callback.cls, set(actions.values())
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MiscConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'misc'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,84 @@
+"""
+In-process prefix index for city type-ahead.
+
+City names are case-folded and kept in sorted arrays: one over all cities
+and one per state and per country. A lookup is a bisect to the first name
+with the prefix followed by a scan of at most `limit` entries, so it never
+touches the database. The index is built on first use and rebuilt lazily
+whenever the geo cache version moves (any Country/State/City save or delete,
+see misc.signals), which also keeps every worker process in step.
+"""
+import threading
+from bisect import bisect_left
+
+from base.cache import get_cache_version
+from .models import City
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+class PrefixIndex:
+
+    def __init__(self, rows):
+        # rows: (folded name, item), sorted by folded name
+        self.keys = [key for key, _ in rows]
+        self.items = [item for _, item in rows]
+
+    def search(self, prefix, limit):
+        keys, items = self.keys, self.items
+        position = bisect_left(keys, prefix)
+        matches = []
+        while position < len(keys) and len(matches) < limit and keys[position].startswith(prefix):
+            matches.append(items[position])
+            position += 1
+        return matches
+
+
+class CityIndex:
+
+    def __init__(self, cities):
+        scoped = {None: []}
+        for city_id, name, code, state_id, country_id in cities:
+            item = {'id': str(city_id), 'name': name, 'code': code, 'state': str(state_id)}
+            row = (name.casefold(), item)
+            scoped[None].append(row)
+            scoped.setdefault(('state', str(state_id)), []).append(row)
+            scoped.setdefault(('country', str(country_id)), []).append(row)
+        self.scopes = {
+            scope: PrefixIndex(sorted(rows, key=lambda row: (row[0], row[1]['id'])))
+            for scope, rows in scoped.items()
+        }
+
+    @classmethod
+    def load(cls):
+        return cls(City.objects.values_list('id', 'name', 'code', 'state_id', 'state__country_id').iterator())
+
+    def search(self, prefix, state=None, country=None, limit=DEFAULT_LIMIT):
+        if state:
+            scope = ('state', state)
+        elif country:
+            scope = ('country', country)
+        else:
+            scope = None
+        index = self.scopes.get(scope)
+        if index is None:
+            return []
+        return index.search(prefix.strip().casefold(), limit)
+
+
+_index = None
+_index_version = None
+_lock = threading.Lock()
+
+
+def get_city_index(cache_group):
+    """The city index for the current version of `cache_group`, (re)built if stale."""
+    global _index, _index_version
+    version = get_cache_version(cache_group)
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _index = CityIndex.load()
+                _index_version = version
+    return _index
@@ -0,0 +1,139 @@
+import csv
+import io
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from base.cache import bump_cache_version
+from base.ids import uuid7
+from misc.models import City, Country, State
+from misc.signals import GEO_CACHE_GROUP
+
+COLUMNS = ('country_name', 'country_code', 'state_name', 'state_code', 'city_name', 'city_code')
+
+
+def read_rows(path):
+    """
+    Stream dicts with COLUMNS from a .csv (with a header row), a .jsonl
+    file (one object per line) or a .json array.
+    """
+    suffix = path.suffix.lower()
+    with path.open(newline='', encoding='utf-8') as handle:
+        if suffix == '.csv':
+            yield from csv.DictReader(handle)
+        elif suffix in ('.jsonl', '.ndjson'):
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        elif suffix == '.json':
+            yield from json.load(handle)
+        else:
+            raise CommandError(f"Unsupported file type {suffix!r}: use .csv, .jsonl or .json")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load countries, states and cities from a CSV or JSON dataset with columns "
+        f"{', '.join(COLUMNS)}. Rows are upserted on the unique constraints "
+        "(country name, state name per country, city name per state), so the "
+        "command can be re-run to update codes. Cities go through COPY on PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--no-copy', action='store_true', help="Use bulk_create for cities even on PostgreSQL.")
+
+    def handle(self, *args, **options):
+        if not options['path'].exists():
+            raise CommandError(f"{options['path']} does not exist")
+        started = time.perf_counter()
+
+        countries, states, cities = {}, {}, {}
+        for line, row in enumerate(read_rows(options['path']), start=1):
+            try:
+                country, state, city = (row['country_name'].strip(), row['state_name'].strip(),
+                                        row['city_name'].strip())
+                countries[country] = row['country_code'].strip()
+                states[country, state] = row['state_code'].strip()
+                cities[country, state, city] = row['city_code'].strip()
+            except (KeyError, AttributeError):
+                raise CommandError(f"Row {line} needs the columns {', '.join(COLUMNS)}")
+
+        use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        with transaction.atomic():
+            country_ids = self.upsert_countries(countries, options['batch_size'])
+            state_ids = self.upsert_states(states, country_ids, options['batch_size'])
+            if use_copy:
+                self.copy_cities(cities, state_ids)
+            else:
+                self.upsert_cities(cities, state_ids, options['batch_size'])
+
+        # bulk writes skip the model signals that invalidate cached geo responses
+        bump_cache_version(GEO_CACHE_GROUP)
+        self.stdout.write(
+            f"Loaded {len(countries)} countries, {len(states)} states and {len(cities)} cities "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    @staticmethod
+    def upsert(model, objects, unique_fields, batch_size):
+        return model.objects.bulk_create(
+            objects, batch_size=batch_size, update_conflicts=True,
+            unique_fields=unique_fields, update_fields=['code', 'updated_at'],
+        )
+
+    # Rows that hit a conflict keep their existing id, which bulk_create doesn't
+    # hand back for objects that already had one, so ids are read back afterwards.
+
+    def upsert_countries(self, countries, batch_size):
+        self.upsert(Country, [Country(name=name, code=code) for name, code in countries.items()],
+                    ['name'], batch_size)
+        return dict(Country.objects.filter(name__in=countries).values_list('name', 'id'))
+
+    def upsert_states(self, states, country_ids, batch_size):
+        objects = [State(name=name, code=code, country_id=country_ids[country])
+                   for (country, name), code in states.items()]
+        self.upsert(State, objects, ['name', 'country'], batch_size)
+        names = {country_id: country for country, country_id in country_ids.items()}
+        rows = State.objects.filter(country_id__in=names).values_list('country_id', 'name', 'id')
+        return {(names[country_id], name): state_id for country_id, name, state_id in rows}
+
+    def upsert_cities(self, cities, state_ids, batch_size):
+        objects = [City(name=name, code=code, state_id=state_ids[country, state])
+                   for (country, state, name), code in cities.items()]
+        self.upsert(City, objects, ['name', 'state'], batch_size)
+
+    def copy_cities(self, cities, state_ids):
+        """COPY into a temporary table, then one INSERT ... ON CONFLICT into the cities table."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for (country, state, name), code in cities.items():
+            writer.writerow((uuid7(), name, code, state_ids[country, state]))
+        buffer.seek(0)
+
+        table = connection.ops.quote_name(City._meta.db_table)
+        state_column = City._meta.get_field('state').column
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE geo_city_stage (id uuid, name varchar(50), code varchar(10), '
+                f'{state_column} uuid) ON COMMIT DROP'
+            )
+            copy_sql = f'COPY geo_city_stage (id, name, code, {state_column}) FROM STDIN WITH (FORMAT csv)'
+            raw = cursor.cursor
+            if hasattr(raw, 'copy'):  # psycopg 3
+                with raw.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+            else:  # psycopg2
+                raw.copy_expert(copy_sql, buffer)
+            cursor.execute(
+                f'INSERT INTO {table} (id, name, code, {state_column}, created_at, updated_at, is_active) '
+                f'SELECT id, name, code, {state_column}, now(), now(), true FROM geo_city_stage '
+                f'ON CONFLICT (name, {state_column}) DO UPDATE '
+                f'SET code = EXCLUDED.code, updated_at = EXCLUDED.updated_at'
+            )
+            # ON COMMIT DROP only fires with the outermost transaction
+            cursor.execute('DROP TABLE geo_city_stage')
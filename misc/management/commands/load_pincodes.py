@@ -0,0 +1,60 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from base.cache import bump_cache_version
+from misc.models import City, Pincode
+from misc.signals import GEO_CACHE_GROUP
+from .load_geo import read_rows
+
+COLUMNS = ('pincode', 'country_name', 'state_name', 'city_name')
+
+
+class Command(BaseCommand):
+    help = (
+        f"Load pincodes from a CSV or JSON dataset with columns {', '.join(COLUMNS)}. "
+        "Cities must already exist (see load_geo). Pincodes are upserted, so re-running "
+        "the command moves a pincode to the city it now names."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        if not options['path'].exists():
+            raise CommandError(f"{options['path']} does not exist")
+        started = time.perf_counter()
+
+        pincodes = {}
+        for line, row in enumerate(read_rows(options['path']), start=1):
+            try:
+                code = str(row['pincode']).strip()
+                pincodes[code] = (row['country_name'].strip(), row['state_name'].strip(), row['city_name'].strip())
+            except (KeyError, AttributeError):
+                raise CommandError(f"Row {line} needs the columns {', '.join(COLUMNS)}")
+            if len(code) != 6 or not code.isdigit():
+                raise CommandError(f"Row {line}: pincode {code!r} must be 6 digits")
+
+        city_ids = {
+            (country, state, name): city_id
+            for city_id, name, state, country in City.objects.values_list(
+                'id', 'name', 'state__name', 'state__country__name').iterator()
+        }
+        missing = sorted({chain for chain in pincodes.values() if chain not in city_ids})
+        if missing:
+            sample = '; '.join(' / '.join(chain) for chain in missing[:5])
+            raise CommandError(f"{len(missing)} cities are not loaded, e.g. {sample}")
+
+        with transaction.atomic():
+            Pincode.objects.bulk_create(
+                [Pincode(code=code, city_id=city_ids[chain]) for code, chain in pincodes.items()],
+                batch_size=options['batch_size'], update_conflicts=True,
+                unique_fields=['code'], update_fields=['city', 'updated_at'],
+            )
+
+        # bulk writes skip the model signals that invalidate the pincode index
+        bump_cache_version(GEO_CACHE_GROUP)
+        self.stdout.write(f"Loaded {len(pincodes)} pincodes in {time.perf_counter() - started:.1f}s")
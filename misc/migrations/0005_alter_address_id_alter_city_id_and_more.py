@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:12
+
+import base.ids
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misc', '0004_alter_address_options_alter_city_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='address',
+            name='id',
+            field=models.UUIDField(default=base.ids.uuid7, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='city',
+            name='id',
+            field=models.UUIDField(default=base.ids.uuid7, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='country',
+            name='id',
+            field=models.UUIDField(default=base.ids.uuid7, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='state',
+            name='id',
+            field=models.UUIDField(default=base.ids.uuid7, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misc', '0005_alter_address_id_alter_city_id_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='country',
+            options={'ordering': ['-created_at'], 'verbose_name': 'Country', 'verbose_name_plural': 'Countries'},
+        ),
+        migrations.AlterField(
+            model_name='country',
+            name='name',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+        migrations.AddConstraint(
+            model_name='city',
+            constraint=models.UniqueConstraint(fields=('name', 'state'), name='unique_city_name_per_state'),
+        ),
+        migrations.AddConstraint(
+            model_name='city',
+            constraint=models.UniqueConstraint(fields=('code', 'state'), name='unique_city_code_per_state'),
+        ),
+        migrations.AddConstraint(
+            model_name='state',
+            constraint=models.UniqueConstraint(fields=('name', 'country'), name='unique_state_name_per_country'),
+        ),
+        migrations.AddConstraint(
+            model_name='state',
+            constraint=models.UniqueConstraint(fields=('code', 'country'), name='unique_state_code_per_country'),
+        ),
+    ]
@@ -53,3 +53,13 @@ class Address(BaseModel):
 
         verbose_name = 'Address'
         verbose_name_plural = 'Addresses'
+
+class Pincode(BaseModel):
+    code = models.CharField(max_length=6, unique=True)
+    city = models.ForeignKey(to=City, on_delete=models.CASCADE, related_name='pincodes')
+
+    class Meta:
+        db_table = 'Pincodes'
+
+        verbose_name = 'Pincode'
+        verbose_name_plural = 'Pincodes'
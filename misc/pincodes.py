@@ -0,0 +1,56 @@
+"""
+In-process pincode → city/state/country index.
+
+The whole table is one dict keyed by pincode, holding the resolved chain,
+so resolving or validating a pincode never touches the database. Like the
+city autocomplete index it is built on first use and rebuilt lazily when
+the geo cache version moves (see misc.signals and load_pincodes).
+"""
+import threading
+
+from base.cache import get_cache_version
+from .models import Pincode
+
+
+class PincodeIndex:
+
+    def __init__(self, rows):
+        self.chains = {}
+        for code, city_id, city, state_id, state, country_id, country in rows:
+            self.chains[code] = {
+                'pincode': code,
+                'city_id': str(city_id), 'city_name': city,
+                'state_id': str(state_id), 'state_name': state,
+                'country_id': str(country_id), 'country_name': country,
+            }
+
+    @classmethod
+    def load(cls):
+        return cls(Pincode.objects.values_list(
+            'code', 'city_id', 'city__name', 'city__state_id', 'city__state__name',
+            'city__state__country_id', 'city__state__country__name',
+        ).iterator())
+
+    def resolve(self, code):
+        """The chain for `code`, or None if the pincode is unknown."""
+        return self.chains.get(code.strip())
+
+    def __len__(self):
+        return len(self.chains)
+
+
+_index = None
+_index_version = None
+_lock = threading.Lock()
+
+
+def get_pincode_index(cache_group):
+    """The pincode index for the current version of `cache_group`, (re)built if stale."""
+    global _index, _index_version
+    version = get_cache_version(cache_group)
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _index = PincodeIndex.load()
+                _index_version = version
+    return _index
@@ -3,6 +3,8 @@ from rest_framework import serializers
 from django.db import transaction
 from base.serializers import BaseModelSerializer
 from .models import Address,City,State,Country
+from .pincodes import get_pincode_index
+from .signals import GEO_CACHE_GROUP
 
 class CountrySerializer(BaseModelSerializer):
     class Meta(BaseModelSerializer.Meta):
@@ -120,8 +122,10 @@ class AddressSerializer(serializers.ModelSerializer):
 
     
 class AddressCreateUpdateSerializer(BaseModelSerializer):
+    # optional: taken from the pincode when left out
     city = serializers.PrimaryKeyRelatedField(
-        queryset=City.objects.all()
+        queryset=City.objects.all(),
+        required=False
     )
     class Meta(BaseModelSerializer.Meta):
         model = Address
@@ -135,4 +139,31 @@ class AddressCreateUpdateSerializer(BaseModelSerializer):
         if not value.isdigit():
             raise serializers.ValidationError("Pincode must only contain numbers!")
         
-        return value
\ No newline at end of file
+        return value
+
+    def validate(self, attrs):
+        """
+        Check the pincode against the pincode index (no queries) and fill in
+        or cross-check the city it belongs to. Until load_pincodes has filled
+        the index, any 6-digit pincode is accepted and the city is required.
+        """
+        pincode = attrs.get('pincode', getattr(self.instance, 'pincode', None))
+        if pincode is None:
+            return attrs
+
+        index = get_pincode_index(GEO_CACHE_GROUP)
+        if not index:
+            if self.instance is None and attrs.get('city') is None:
+                raise serializers.ValidationError({'city': "This field is required."})
+            return attrs
+
+        chain = index.resolve(pincode)
+        if chain is None:
+            raise serializers.ValidationError({'pincode': "Unknown pincode!"})
+
+        city = attrs.get('city')
+        if city is None and 'pincode' in attrs:
+            attrs['city_id'] = chain['city_id']
+        elif city is not None and str(city.pk) != chain['city_id']:
+            raise serializers.ValidationError({'city': "City does not match the pincode!"})
+        return attrs
\ No newline at end of file
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from base.cache import bump_cache_version
+from .models import City, Country, Pincode, State
+
+GEO_CACHE_GROUP = 'geo'
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=State)
+@receiver(post_save, sender=City)
+@receiver(post_save, sender=Pincode)
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=State)
+@receiver(post_delete, sender=City)
+@receiver(post_delete, sender=Pincode)
+def invalidate_geo_cache(sender, **kwargs):
+    """Countries, states, cities and pincodes are cached as one group (see CachedResponseMixin)."""
+    bump_cache_version(GEO_CACHE_GROUP)
@@ -1,3 +1,220 @@
+import csv
+import io
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from base.compiled import compile_read_plan
+from base.testing import QueryBudgetTestCase
+from .models import City, Country, Pincode, State
+from .serializers import AddressCreateUpdateSerializer, CitySerializer, CountrySerializer, StateSerializer
+from .views import CityViewSet, CountryViewSet, PincodeViewSet, StateViewSet
+
+User = get_user_model()
+
+
+class GeoQueryBudgetTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.authenticate(User.objects.create_user('geo'))
+        for i in range(3):
+            country = Country.objects.create(name=f'COUNTRY{i}', code=f'C{i}')
+        for i in range(3):
+            state = State.objects.create(name=f'STATE{i}', code=f'S{i}', country=country)
+        for i in range(3):
+            City.objects.create(name=f'CITY{i}', code=f'CT{i}', state=state)
+        self.country = country
+        self.state = state
+
+    def test_country_list(self):
+        with self.assertQueryBudget(CountryViewSet, 'list'):
+            response = self.client.get('/misc/countries/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_country_create(self):
+        with self.assertQueryBudget(CountryViewSet, 'create'):
+            response = self.client.post('/misc/countries/', {'name': 'NEW', 'code': 'NW'}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_state_list(self):
+        with self.assertQueryBudget(StateViewSet, 'list'):
+            response = self.client.get('/misc/states/', {'country': self.country.pk})
+        self.assertEqual(response.status_code, 200)
+
+    def test_city_list(self):
+        with self.assertQueryBudget(CityViewSet, 'list'):
+            response = self.client.get('/misc/cities/', {'state': self.state.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_compiled_plans_match_serializers(self):
+        Country.objects.filter(pk=self.country.pk).update(created_by=User.objects.get(username='geo'))
+        for serializer_class, queryset in [(CountrySerializer, Country.objects.all()),
+                                           (StateSerializer, State.objects.all()),
+                                           (CitySerializer, City.objects.all())]:
+            plan = compile_read_plan(serializer_class, queryset)
+            self.assertIsNotNone(plan, serializer_class.__name__)
+            expected = [dict(item) for item in serializer_class(queryset, many=True).data]
+            self.assertEqual(plan.render(plan.values(queryset)), expected, serializer_class.__name__)
+
+
+class ReferenceDataCacheTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.authenticate(User.objects.create_user('geo'))
+        self.country = Country.objects.create(name='INDIA', code='IN')
+        State.objects.create(name='KERALA', code='KL', country=self.country)
+
+    def test_repeat_load_skips_the_database(self):
+        first = self.client.get('/misc/states/', {'country': self.country.pk})
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('private', first['Cache-Control'])
+
+        with self.assertNumQueries(0):  # the user comes from the token claims
+            second = self.client.get('/misc/states/', {'country': self.country.pk})
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        not_modified = self.client.get('/misc/states/', {'country': self.country.pk},
+                                       HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_save_and_delete_invalidate(self):
+        first = self.client.get('/misc/states/', {'country': self.country.pk})
+        state = State.objects.create(name='GOA', code='GA', country=self.country)
+
+        second = self.client.get('/misc/states/', {'country': self.country.pk}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(len(second.json()['results']), 2)
+
+        state.delete()
+        third = self.client.get('/misc/states/', {'country': self.country.pk})
+        self.assertEqual(len(third.json()['results']), 1)
+
+
+class CityAutocompleteTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.authenticate(User.objects.create_user('geo'))
+        india = Country.objects.create(name='INDIA', code='IN')
+        self.kerala = State.objects.create(name='KERALA', code='KL', country=india)
+        self.goa = State.objects.create(name='GOA', code='GA', country=india)
+        for name in ['KOCHI', 'KOLLAM', 'KOTTAYAM', 'THRISSUR']:
+            City.objects.create(name=name, code=name[:3], state=self.kerala)
+        City.objects.create(name='KOLVA', code='KLV', state=self.goa)
+
+    def names(self, **params):
+        response = self.client.get('/misc/cities/autocomplete/', params)
+        self.assertEqual(response.status_code, 200)
+        return [city['name'] for city in response.data]
+
+    def test_prefix_scoped_by_state(self):
+        with self.assertQueryBudget(CityViewSet, 'autocomplete'):
+            self.assertEqual(self.names(q='ko', state=self.kerala.pk), ['KOCHI', 'KOLLAM', 'KOTTAYAM'])
+        self.assertEqual(self.names(q='kol'), ['KOLLAM', 'KOLVA'])
+        self.assertEqual(self.names(q='kol', country=self.goa.country_id, limit=1), ['KOLLAM'])
+        self.assertEqual(self.names(q='ko', state='unknown'), [])
+
+    def test_served_from_memory_and_refreshed_on_change(self):
+        self.names(q='ko')
+        with self.assertNumQueries(0):  # the user comes from the token claims
+            self.names(q='th')
+
+        City.objects.create(name='KOZHIKODE', code='KZD', state=self.kerala)
+        self.assertIn('KOZHIKODE', self.names(q='koz'))
+
+
+class LoadGeoTests(TestCase):
+
+    def write_dataset(self, directory, rows):
+        path = Path(directory) / 'geo.csv'
+        with path.open('w', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(('country_name', 'country_code', 'state_name', 'state_code', 'city_name', 'city_code'))
+            writer.writerows(rows)
+        return path
+
+    def check_reload_updates_codes(self, *args):
+        rows = [('INDIA', 'IN', 'GUJARAT', 'GJ', f'CITY{i}', f'C{i}') for i in range(5)]
+        rows.append(('INDIA', 'IN', 'KERALA', 'KL', 'KOCHI', 'KC'))
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('load_geo', self.write_dataset(directory, rows), *args, stdout=io.StringIO())
+            rows = [('INDIA', 'IND', *row[2:]) for row in rows]
+            rows[0] = ('INDIA', 'IND', 'GUJARAT', 'GJ', 'CITY0', 'NEW')
+            call_command('load_geo', self.write_dataset(directory, rows), *args, stdout=io.StringIO())
+
+        self.assertEqual(Country.objects.get().code, 'IND')
+        self.assertEqual(State.objects.count(), 2)
+        self.assertEqual(City.objects.count(), 6)
+        self.assertEqual(City.objects.get(name='CITY0').code, 'NEW')
+        self.assertEqual(City.objects.get(name='KOCHI').state.name, 'KERALA')
+
+    def test_copy(self):
+        self.check_reload_updates_codes()
+
+    def test_bulk_create(self):
+        self.check_reload_updates_codes('--no-copy')
+
+
+class PincodeTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.authenticate(User.objects.create_user('geo'))
+        india = Country.objects.create(name='INDIA', code='IN')
+        gujarat = State.objects.create(name='GUJARAT', code='GJ', country=india)
+        self.ahmedabad = City.objects.create(name='AHMEDABAD', code='AMD', state=gujarat)
+        self.surat = City.objects.create(name='SURAT', code='STV', state=gujarat)
+        Pincode.objects.create(code='380001', city=self.ahmedabad)
+
+    def test_resolve(self):
+        self.client.get('/misc/pincodes/380001/')
+        with self.assertQueryBudget(PincodeViewSet, 'retrieve'), self.assertNumQueries(0):
+            response = self.client.get('/misc/pincodes/380001/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['city_name'], 'AHMEDABAD')
+        self.assertEqual(response.data['state_name'], 'GUJARAT')
+        self.assertEqual(response.data['country_name'], 'INDIA')
+
+        self.assertEqual(self.client.get('/misc/pincodes/999999/').status_code, 404)
+
+    def test_address_validation(self):
+        data = {'primary_address': 'Street 1', 'pincode': '380001'}
+        serializer = AddressCreateUpdateSerializer(data=data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.save().city, self.ahmedabad)
+
+        serializer = AddressCreateUpdateSerializer(data={**data, 'city': self.surat.pk})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('city', serializer.errors)
+
+        serializer = AddressCreateUpdateSerializer(data={**data, 'pincode': '999999'})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('pincode', serializer.errors)
+
+    def test_address_validation_without_pincodes(self):
+        Pincode.objects.all().delete()
+        data = {'primary_address': 'Street 1', 'pincode': '999999'}
+        serializer = AddressCreateUpdateSerializer(data=data)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('city', serializer.errors)
+
+        serializer = AddressCreateUpdateSerializer(data={**data, 'city': self.surat.pk})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.save().city, self.surat)
+
+    def test_load_pincodes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'pincodes.jsonl'
+            path.write_text(
+                '{"pincode": "380001", "country_name": "INDIA", "state_name": "GUJARAT", "city_name": "SURAT"}\n'
+                '{"pincode": "395003", "country_name": "INDIA", "state_name": "GUJARAT", "city_name": "SURAT"}\n'
+            )
+            call_command('load_pincodes', path, stdout=io.StringIO())
+
+        self.assertEqual(Pincode.objects.count(), 2)
+        self.assertEqual(Pincode.objects.get(code='380001').city, self.surat)
+        self.assertEqual(self.client.get('/misc/pincodes/395003/').data['city_name'], 'SURAT')
@@ -1,12 +1,13 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path,include
 
-from .views import CountryViewSet,StateViewSet,CityViewSet
+from .views import CountryViewSet,StateViewSet,CityViewSet,PincodeViewSet
 
 router=DefaultRouter()
 router.register(r'countries',CountryViewSet,basename='countries')
 router.register(r'states',StateViewSet,basename='states')
 router.register(r'cities',CityViewSet,basename='cities')
+router.register(r'pincodes',PincodeViewSet,basename='pincodes')
 
 
 urlpatterns=[
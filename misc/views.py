@@ -1,18 +1,24 @@
 from rest_framework import viewsets,permissions,status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
 
-from base.views import BaseViewSet
+from base.views import BaseViewSet, CachedResponseMixin, CompiledListMixin
 from .models import Country,State,City,Address
+from .autocomplete import DEFAULT_LIMIT, MAX_LIMIT, get_city_index
+from .pincodes import get_pincode_index
+from .signals import GEO_CACHE_GROUP
 from .serializers import (
     CountryCreateUpdateSerializer,CountrySerializer,StateCreateUpdateSerializer,StateSerializer,
     CityCreateUpdateSerializer,CitySerializer,AddressSerializer,AddressCreateUpdateSerializer
 )
 
 
-class CountryViewSet(BaseViewSet, viewsets.ModelViewSet):
+class CountryViewSet(CachedResponseMixin, CompiledListMixin, BaseViewSet, viewsets.ModelViewSet):
     queryset = Country.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 2, 'retrieve': 2, 'create': 3, 'update': 3, 'partial_update': 3, 'destroy': 10}
+    cache_group = GEO_CACHE_GROUP
     search_fields = ['name','code']
     ordering_fields = ['name','code','created_at']
 
@@ -49,9 +55,11 @@ class CountryViewSet(BaseViewSet, viewsets.ModelViewSet):
                 ,status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
-class StateViewSet(BaseViewSet,viewsets.ModelViewSet):
+class StateViewSet(CachedResponseMixin, CompiledListMixin, BaseViewSet, viewsets.ModelViewSet):
 
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 2, 'retrieve': 2, 'create': 5, 'update': 5, 'partial_update': 5, 'destroy': 8}
+    cache_group = GEO_CACHE_GROUP
     search_fields = ['name','code','country']
     ordering_fields = ['name','code','created_at','country']
 
@@ -99,9 +107,12 @@ class StateViewSet(BaseViewSet,viewsets.ModelViewSet):
                 ,status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class CityViewSet(BaseViewSet,viewsets.ModelViewSet):
+class CityViewSet(CachedResponseMixin, CompiledListMixin, BaseViewSet, viewsets.ModelViewSet):
     
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 2, 'retrieve': 2, 'autocomplete': 2, 'create': 5, 'update': 5, 'partial_update': 5,
+                    'destroy': 6}
+    cache_group = GEO_CACHE_GROUP
     search_fields = ['name','code','state']
     ordering_fields = ['name','code','created_at','state']
 
@@ -112,6 +123,23 @@ class CityViewSet(BaseViewSet,viewsets.ModelViewSet):
             qs = qs.filter(state_id=state_id)
         return qs
 
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Cities whose name starts with `q` (case-insensitive), optionally
+        within a `state` or `country`, alphabetically, at most `limit`.
+        Served from the in-process index in misc.autocomplete.
+        """
+        params = request.query_params
+        try:
+            limit = min(max(int(params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            limit = DEFAULT_LIMIT
+        index = get_city_index(self.cache_group)
+        results = index.search(params.get('q', ''), state=params.get('state'), country=params.get('country'),
+                               limit=limit)
+        return Response(results, status=status.HTTP_200_OK)
+
     def get_serializer_class(self):
         if self.action in ['create','update','partial_update']:
             return CityCreateUpdateSerializer
@@ -149,6 +177,22 @@ class CityViewSet(BaseViewSet,viewsets.ModelViewSet):
                 ,status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
+class PincodeViewSet(BaseViewSet):
+    """
+    Resolve a pincode to its city, state and country in one call, from the
+    in-process index in misc.pincodes.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'retrieve': 2}
+    cache_group = GEO_CACHE_GROUP
+    lookup_value_regex = r'[0-9]{6}'
+
+    def retrieve(self, request, pk=None):
+        chain = get_pincode_index(self.cache_group).resolve(pk)
+        if chain is None:
+            return Response({'error': "Unknown pincode"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(chain, status=status.HTTP_200_OK)
+
 class AddressViewSet(BaseViewSet,viewsets.ModelViewSet):
     queryset = Address.objects.all()
     permission_classes = [permissions.IsAuthenticated]
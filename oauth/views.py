@@ -2,7 +2,7 @@ from rest_framework import viewsets,permissions,status
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from users.tokens import UserRefreshToken
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from rest_framework.authentication import SessionAuthentication
@@ -19,6 +19,7 @@ from .serializers import OAuthUserProfileCreateSerializer,OAuthUserProfileViewSe
 class OAuthUserProfileViewSet(BaseViewSet, viewsets.ModelViewSet):
     
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 5, 'retrieve': 5, 'create': 4, 'update': 8, 'partial_update': 8, 'destroy': 4}
     
     def get_queryset(self):
         return UserProfile.objects.filter(user=self.request.user)
@@ -106,7 +107,7 @@ def github_oauth_callback(request):
     """
     user = request.user
 
-    refresh = RefreshToken.for_user(user)
+    refresh = UserRefreshToken.for_user(user)
 
     access = str(refresh.access_token)
     refresh = str(refresh)
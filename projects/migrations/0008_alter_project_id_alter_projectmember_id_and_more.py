@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:12
+
+import base.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_story_search_vector_story_story_search_vector_gin'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='id',
+            field=models.UUIDField(default=base.ids.uuid7, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='projectmember',
+            name='id',
+            field=models.UUIDField(default=base.ids.uuid7, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='story',
+            name='id',
+            field=models.UUIDField(default=base.ids.uuid7, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:13
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build indexes without blocking writes on live tables.
+    atomic = False
+
+    dependencies = [
+        ('projects', '0008_alter_project_id_alter_projectmember_id_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='projectmember',
+            index=models.Index(fields=['user', 'project'], name='member_user_project_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='projectmember',
+            index=models.Index(models.F('project'), models.OrderBy(models.F('created_at'), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), name='member_project_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='story',
+            index=models.Index(models.F('project'), models.OrderBy(models.F('created_at'), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), name='story_project_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='story',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['project', 'status'], name='story_active_status_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models import F, Q
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
 
 from base.models import BaseModel
+from base.search import search_vector_field
 
 class Project(BaseModel):
 
@@ -29,15 +32,51 @@ class ProjectMember(BaseModel):
 
         verbose_name = 'Project Member'
         verbose_name_plural = 'Project Members'
+        indexes = [
+            # Membership lookups (project scoping, permissions) are answered from the index alone.
+            models.Index(fields=['user', 'project'], name='member_user_project_idx'),
+            models.Index(F('project'), F('created_at').desc(nulls_last=True), F('id').desc(),
+                         name='member_project_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Membership as loaded, so cache invalidation also covers a changed user/project.
+        instance._loaded_membership = (instance.__dict__.get('user_id'), instance.__dict__.get('project_id'))
+        return instance
 
 class Story(BaseModel):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='stories')
     title = models.CharField(max_length=100)
     description = models.TextField()
     status = models.CharField(max_length=50)
+    search_vector = search_vector_field(('title', 'A'), ('description', 'B'))
 
     class Meta:
         db_table = 'Project_Stories'
 
         verbose_name = 'Project Story'
         verbose_name_plural = 'Project Stories'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='story_search_vector_gin'),
+            models.Index(F('project'), F('created_at').desc(nulls_last=True), F('id').desc(),
+                         name='story_project_created_idx'),
+            models.Index(fields=['project', 'status'], condition=Q(is_active=True),
+                         name='story_active_status_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_project_id = instance.__dict__.get('project_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Read by receivers that keep data denormalized from the story in sync.
+        self.project_moved = (
+            not self._state.adding
+            and self.project_id != getattr(self, '_loaded_project_id', self.project_id)
+        )
+        super().save(*args, **kwargs)
+        self._loaded_project_id = self.project_id
@@ -0,0 +1,65 @@
+import uuid
+
+from django.core.cache import cache
+from rest_framework import permissions
+
+from .models import ProjectMember
+
+MEMBERSHIP_CACHE_TIMEOUT = 60 * 10
+# Cached for non-members so repeated denied requests don't hit the database either.
+NOT_A_MEMBER = ''
+
+
+def membership_cache_key(user_id, project_id):
+    return f'project-membership:{user_id}:{project_id}'
+
+
+def invalidate_membership(user_id, project_id):
+    cache.delete(membership_cache_key(user_id, project_id))
+
+
+def get_project_role(request, project_id):
+    """
+    Role of the requesting user in the project, or None if not a member.
+
+    Resolved at most once per request, and across requests through the
+    shared cache; ProjectMember save/delete invalidates the entry.
+    """
+    roles = request.__dict__.setdefault('_project_roles', {})
+    if project_id in roles:
+        return roles[project_id]
+
+    key = membership_cache_key(request.user.pk, project_id)
+    role = cache.get(key)
+    if role is None:
+        role = ProjectMember.objects.filter(
+            user_id=request.user.pk, project_id=project_id
+        ).values_list('role', flat=True).first() or NOT_A_MEMBER
+        cache.set(key, role, MEMBERSHIP_CACHE_TIMEOUT)
+
+    roles[project_id] = role or None
+    return roles[project_id]
+
+
+class IsProjectMember(permissions.BasePermission):
+    """
+    Allows access to nested project routes (`project_pk` URL kwarg) only to
+    members of that project. The caller's role is exposed as `request.project_role`.
+    """
+    message = 'You are not a member of this project.'
+
+    def has_permission(self, request, view):
+        project_id = view.kwargs.get('project_pk')
+        if project_id is None:
+            return True
+        if not request.user or not request.user.is_authenticated:
+            return False
+
+        try:
+            project_id = uuid.UUID(str(project_id))
+        except ValueError:
+            return False
+
+        role = get_project_role(request, project_id)
+        request.project_role = role
+        return role is not None
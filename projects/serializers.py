@@ -39,6 +39,9 @@ class ProjectMemberCreateUpdateSerializer(BaseModelSerializer):
         model = ProjectMember
         fields = ['user','role','project']
 
+    def validate_project(self, value):
+        return self.check_url_parent(value, pk='project_pk')
+
     def validate(self,attrs):
         project= attrs['project']
         user = attrs['user']
@@ -72,11 +75,23 @@ class StorySerializer(BaseModelSerializer):
 
 
 
+class StorySearchResultSerializer(BaseModelSerializer):
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta(BaseModelSerializer.Meta):
+        model = Story
+        fields = ['id', 'project', 'title', 'status', 'rank', 'headline']
+
+
 class StoryCreateUpdateSerializer(BaseModelSerializer):
     class Meta(BaseModelSerializer.Meta):
         model = Story
         fields = ['project','title','description','status',]
 
+    def validate_project(self, value):
+        return self.check_url_parent(value, pk='project_pk')
+
     def validate(self,attrs):
 
         valid_statuses = ['todo', 'in_progress', 'review', 'done', 'blocked']
@@ -102,6 +117,27 @@ class ProjectSerializer(BaseModelSerializer):
         ]
 
 
+class ProjectListSerializer(BaseModelSerializer):
+    """
+    Summary representation used by the project list.
+    Counts come from queryset annotations; ticket status counts are read
+    from the serializer context, computed once for the whole page.
+    """
+    story_count = serializers.IntegerField(read_only=True)
+    member_count = serializers.IntegerField(read_only=True)
+    ticket_status_counts = serializers.SerializerMethodField()
+
+    class Meta(BaseModelSerializer.Meta):
+        model = Project
+        fields = [
+            'id', 'name', 'description', 'start_date', 'end_date', 'status',
+            'story_count', 'member_count', 'ticket_status_counts',
+        ]
+
+    def get_ticket_status_counts(self, obj):
+        return self.context.get('ticket_status_counts', {}).get(obj.pk, {})
+
+
 class ProjectCreateUpdateSerializer(BaseModelSerializer):
     class Meta(BaseModelSerializer.Meta):
         model = Project
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ProjectMember
+from .permissions import invalidate_membership
+
+
+@receiver(post_save, sender=ProjectMember)
+@receiver(post_delete, sender=ProjectMember)
+def invalidate_membership_cache(sender, instance, **kwargs):
+    invalidate_membership(instance.user_id, instance.project_id)
+
+    loaded = getattr(instance, '_loaded_membership', None)
+    if loaded and loaded != (instance.user_id, instance.project_id):
+        invalidate_membership(*loaded)
+    instance._loaded_membership = (instance.user_id, instance.project_id)
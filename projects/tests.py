@@ -1,3 +1,138 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from base.queries import QueryRecorder
+from base.testing import QueryBudgetTestCase
+from tickets.models import Ticket
+from .permissions import membership_cache_key
+from .models import Project, ProjectMember, Story
+from .views import ProjectView, ProjectMemberViewSet, StoryView
+
+User = get_user_model()
+
+
+class ProjectQueryBudgetTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner')
+        self.authenticate(self.user)
+        for i in range(3):
+            project = Project.objects.create(name=f'Project {i}', description='desc', status='active')
+            ProjectMember.objects.create(project=project, user=self.user, role='owner')
+            for j in range(3):
+                member = User.objects.create_user(f'member{i}{j}')
+                ProjectMember.objects.create(project=project, user=member, role='developer', created_by=member)
+                Story.objects.create(project=project, title=f'Story {j}', description='desc',
+                                     status='todo', created_by=member)
+        self.project = project
+        self.story = project.stories.first()
+        self.member = project.project_members.first()
+        stories = list(project.stories.all())
+        members = list(project.project_members.filter(role='developer'))
+        for story, member, ticket_status in zip(stories, members, ['todo', 'todo', 'done']):
+            Ticket.objects.create(story=story, title='Ticket', description='desc', assigned_member=member,
+                                  status=ticket_status, priority='low', type='task', due_date=date.today())
+
+    def test_project_list(self):
+        with self.assertQueryBudget(ProjectView, 'list'):
+            response = self.client.get('/projects/projects/')
+        self.assertEqual(response.status_code, 200)
+        results = {row['id']: row for row in response.data['results']}
+        self.assertEqual(len(results), 3)
+        for row in results.values():
+            self.assertEqual((row['story_count'], row['member_count']), (3, 4))
+        self.assertEqual(results[str(self.project.pk)]['ticket_status_counts'], {'todo': 2, 'done': 1})
+        others = [row for pk, row in results.items() if pk != str(self.project.pk)]
+        self.assertEqual([row['ticket_status_counts'] for row in others], [{}, {}])
+
+    def test_project_retrieve(self):
+        with self.assertQueryBudget(ProjectView, 'retrieve'):
+            response = self.client.get(f'/projects/projects/{self.project.pk}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_project_create(self):
+        data = {'name': 'New', 'description': 'desc', 'status': 'active'}
+        with self.assertQueryBudget(ProjectView, 'create'):
+            response = self.client.post('/projects/projects/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_project_update(self):
+        data = {'name': 'Renamed', 'description': 'desc', 'status': 'active'}
+        with self.assertQueryBudget(ProjectView, 'update'):
+            response = self.client.put(f'/projects/projects/{self.project.pk}/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_story_list(self):
+        with self.assertQueryBudget(StoryView, 'list'):
+            response = self.client.get(f'/projects/projects/{self.project.pk}/stories/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_story_retrieve(self):
+        with self.assertQueryBudget(StoryView, 'retrieve'):
+            response = self.client.get(f'/projects/projects/{self.project.pk}/stories/{self.story.pk}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_member_list(self):
+        with self.assertQueryBudget(ProjectMemberViewSet, 'list'):
+            response = self.client.get(f'/projects/projects/{self.project.pk}/project-members/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_member_retrieve(self):
+        with self.assertQueryBudget(ProjectMemberViewSet, 'retrieve'):
+            response = self.client.get(f'/projects/projects/{self.project.pk}/project-members/{self.member.pk}/')
+        self.assertEqual(response.status_code, 200)
+
+
+class ProjectMembershipPermissionTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('member')
+        self.project = Project.objects.create(name='Project', description='desc', status='active')
+        self.membership = ProjectMember.objects.create(project=self.project, user=self.user, role='developer')
+        self.url = f'/projects/projects/{self.project.pk}/stories/'
+        self.authenticate(self.user)
+
+    def test_non_members_are_rejected(self):
+        self.authenticate(User.objects.create_user('outsider'))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_membership_is_cached_across_requests(self):
+        self.client.get(self.url)
+        self.assertEqual(cache.get(membership_cache_key(self.user.pk, self.project.pk)), 'developer')
+
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([sql for sql in recorder.queries if 'Project_Members' in sql])
+
+    def test_removing_a_member_invalidates_the_cache(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.membership.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_moving_a_member_invalidates_the_old_project(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        membership = ProjectMember.objects.get(pk=self.membership.pk)
+        membership.project = Project.objects.create(name='Other', description='desc', status='active')
+        membership.save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_stories_cannot_be_created_in_other_projects(self):
+        other = Project.objects.create(name='Other', description='desc', status='active')
+        data = {'project': str(other.pk), 'title': 'Story', 'description': 'desc', 'status': 'todo'}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Story.objects.filter(project=other).exists())
+
+        data['project'] = str(self.project.pk)
+        self.assertEqual(self.client.post(self.url, data, format='json').status_code, 201)
+
+    def test_stories_of_other_projects_are_not_reachable(self):
+        other = Project.objects.create(name='Other', description='desc', status='active')
+        story = Story.objects.create(project=other, title='Hidden', description='desc', status='todo')
+        response = self.client.get(f'{self.url}{story.pk}/')
+        self.assertEqual(response.status_code, 404)
@@ -1,14 +1,60 @@
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from rest_framework import viewsets,status,permissions,filters
 from rest_framework.response import Response
 
 from .models import Project, ProjectMember,Story
-from .serializers import (ProjectCreateUpdateSerializer,ProjectSerializer,StorySerializer,StoryCreateUpdateSerializer,
-                            ProjectMemberSerializer,ProjectMemberCreateUpdateSerializer)
-from base.views import BaseViewSet
+from .permissions import IsProjectMember
+from .serializers import (ProjectCreateUpdateSerializer,ProjectSerializer,ProjectListSerializer,StorySerializer,
+                            StoryCreateUpdateSerializer,ProjectMemberSerializer,ProjectMemberCreateUpdateSerializer)
+from base.views import BaseViewSet, CompiledListMixin
+from tickets.models import Ticket
+
+
+def project_count_subquery(model):
+    """Correlated COUNT of `model` rows per project, 0 when there are none."""
+    counts = (
+        model.objects.filter(project=OuterRef('pk'))
+        .order_by()
+        .values('project')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def project_detail_prefetches():
+    """Prefetches needed by the nested ProjectSerializer payload."""
+    return (
+        Prefetch('stories', queryset=Story.objects.select_related('created_by', 'updated_by')),
+        Prefetch('project_members', queryset=ProjectMember.objects.select_related('user')),
+    )
+
+
+def ticket_status_counts(project_ids):
+    """
+    Group tickets of the given projects by status in a single query.
+
+    Returns:
+        dict: {project_id: {status: count}}
+    """
+    result = {}
+    rows = (
+        Ticket.objects.filter(project_id__in=project_ids)
+        .order_by()
+        .values('project_id', 'status')
+        .annotate(count=Count('pk'))
+    )
+    for row in rows:
+        result.setdefault(row['project_id'], {})[row['status']] = row['count']
+    return result
+
 
 class ProjectView(BaseViewSet, viewsets.ModelViewSet):
     
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 3, 'retrieve': 4, 'create': 6, 'update': 6, 'partial_update': 6, 'destroy': 16}
+    read_replica = True
     search_fields = ['name','description']
     ordering_fields = ['name','start_date','end_date','created_at']
     lookup_field = 'id'          # or 'uuid'
@@ -16,14 +62,39 @@ class ProjectView(BaseViewSet, viewsets.ModelViewSet):
 
 
     def get_queryset(self):
-        return Project.objects.filter(project_members__user=self.request.user).distinct()
+        member_projects = ProjectMember.objects.filter(user=self.request.user).values('project_id')
+        queryset = Project.objects.filter(id__in=member_projects)
+
+        if self.action == 'list':
+            queryset = queryset.annotate(
+                story_count=project_count_subquery(Story),
+                member_count=project_count_subquery(ProjectMember),
+            )
+        elif self.action == 'retrieve':
+            queryset = queryset.prefetch_related(*project_detail_prefetches())
+        return queryset
 
     def get_serializer_class(self):
         
         if self.action in ['create','update','partial_update']:
             return ProjectCreateUpdateSerializer
+        if self.action == 'list':
+            return ProjectListSerializer
         return ProjectSerializer
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        projects = page if page is not None else list(queryset)
+
+        context = self.get_serializer_context()
+        context['ticket_status_counts'] = ticket_status_counts([project.pk for project in projects])
+        serializer = self.get_serializer(projects, many=True, context=context)
+
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
     def create(self,request,*args,**kwargs):
         try:
             serializer = self.get_serializer(data=request.data)
@@ -55,7 +126,8 @@ class ProjectView(BaseViewSet, viewsets.ModelViewSet):
             serializer.is_valid(raise_exception=True)
             self.perform_update(serializer)
 
-            response_serializer = ProjectSerializer(serializer.instance)
+            project = Project.objects.prefetch_related(*project_detail_prefetches()).get(pk=serializer.instance.pk)
+            response_serializer = ProjectSerializer(project)
 
             return Response(
                 {
@@ -72,11 +144,18 @@ class ProjectView(BaseViewSet, viewsets.ModelViewSet):
             }, 
             status=status.HTTP_400_BAD_REQUEST)
         
-class StoryView(BaseViewSet,viewsets.ModelViewSet):
-    queryset = Story.objects.all()
-    permission_classes = [permissions.IsAuthenticated]
+class StoryView(CompiledListMixin, BaseViewSet, viewsets.ModelViewSet):
+    permission_classes = [permissions.IsAuthenticated, IsProjectMember]
+    query_budget = {'list': 3, 'retrieve': 3, 'create': 4, 'update': 5, 'partial_update': 5, 'destroy': 8}
+    read_replica = True
     filterset_fields = ['project_id','status','is_active']
     search_fields = ['title','description']
+    search_vector_field = 'search_vector'
+
+    def get_queryset(self):
+        return Story.objects.select_related('created_by', 'updated_by').filter(
+            project_id=self.kwargs.get('project_pk')
+        )
 
     def get_serializer_class(self):
         if self.action in ['create','update','partial_update']:
@@ -106,10 +185,13 @@ class StoryView(BaseViewSet,viewsets.ModelViewSet):
                 'error': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
         
-class ProjectMemberViewSet(BaseViewSet,viewsets.ModelViewSet,):
-    queryset = ProjectMember.objects.all()
-    permission_classes = [permissions.IsAuthenticated]
+class ProjectMemberViewSet(CompiledListMixin, BaseViewSet, viewsets.ModelViewSet):
+    permission_classes = [permissions.IsAuthenticated, IsProjectMember]
+    query_budget = {'list': 3, 'retrieve': 3, 'create': 7, 'update': 7, 'partial_update': 7, 'destroy': 5}
     filterset_fields = ['project_id', 'user_id', 'role', 'is_active']
+
+    def get_queryset(self):
+        return ProjectMember.objects.select_related('user').filter(project_id=self.kwargs.get('project_pk'))
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -0,0 +1,51 @@
+from .models import Ticket, TicketHistory
+
+TRACKED_FIELDS = ('story', 'title', 'description', 'assigned_member', 'status', 'priority', 'type', 'due_date',
+                  'is_active')
+
+VALUE_MAX_LENGTH = TicketHistory._meta.get_field('old_value').max_length
+HISTORY_BATCH_SIZE = 500
+
+
+def snapshot(ticket):
+    """
+    Current values of the tracked fields, read from the instance itself
+    (FKs by their `_id` attribute) so taking one never hits the database.
+    """
+    return {name: getattr(ticket, Ticket._meta.get_field(name).attname) for name in TRACKED_FIELDS}
+
+
+def _as_text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return str(value)[:VALUE_MAX_LENGTH]
+
+
+def diff(ticket, before, user=None):
+    """Unsaved TicketHistory rows for every tracked field that changed since `before`."""
+    after = snapshot(ticket)
+    return [
+        TicketHistory(
+            ticket=ticket,
+            field_changed=name,
+            old_value=_as_text(before[name]),
+            new_value=_as_text(after[name]),
+            created_by=user,
+        )
+        for name in TRACKED_FIELDS
+        if before[name] != after[name]
+    ]
+
+
+def record_changes(changes, user=None):
+    """
+    Write history for any number of `(ticket, before)` pairs with a single
+    bulk_create (chunked by HISTORY_BATCH_SIZE), whatever the number of
+    tickets and changed fields.
+    """
+    rows = [row for ticket, before in changes for row in diff(ticket, before, user)]
+    if rows:
+        TicketHistory.objects.bulk_create(rows, batch_size=HISTORY_BATCH_SIZE)
+    return rows
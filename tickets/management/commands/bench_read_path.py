@@ -0,0 +1,69 @@
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from base.compiled import compile_read_plan
+from projects.models import Project, ProjectMember, Story
+from tickets.models import Ticket
+from tickets.serializers import TicketSerializer
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering tickets with TicketSerializer against the compiled "
+        ".values_list() read path. Test rows are created in a transaction "
+        "that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                queryset = self.create_tickets(options['tickets'])
+                self.run(queryset, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create_tickets(self, count):
+        user = User.objects.create_user('bench-read-path')
+        project = Project.objects.create(name='Bench', description='bench', status='active')
+        member = ProjectMember.objects.create(project=project, user=user, role='owner')
+        story = Story.objects.create(project=project, title='Bench', description='bench', status='todo')
+        Ticket.objects.bulk_create(
+            Ticket(story=story, project=project, title=f'Ticket {i}', description='x' * 200,
+                   assigned_member=member, status='todo', priority='high', type='bug',
+                   due_date=date.today(), created_by=user, updated_by=user)
+            for i in range(count)
+        )
+        return Ticket.objects.filter(story=story).select_related('created_by', 'updated_by')
+
+    def run(self, queryset, repeat):
+        plan = compile_read_plan(TicketSerializer, queryset)
+        paths = {
+            'serializer': lambda: TicketSerializer(queryset.all(), many=True).data,
+            'compiled': lambda: plan.render(plan.values(queryset.all())),
+        }
+
+        results = {}
+        for name, render in paths.items():
+            render()  # warm up
+            started = time.perf_counter()
+            for _ in range(repeat):
+                rows = render()
+            results[name] = (time.perf_counter() - started) / repeat
+            self.stdout.write(f"{name:<12}{len(rows):>8} rows{results[name] * 1000:>10.1f} ms")
+
+        self.stdout.write(f"speedup     {results['serializer'] / results['compiled']:>14.1f}x")
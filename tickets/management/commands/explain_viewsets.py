@@ -0,0 +1,128 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from base.pagination import KeysetPagination
+from base.views import iter_routed_viewsets
+from projects.models import ProjectMember, Story
+from tickets.models import Ticket, TicketComment
+
+User = get_user_model()
+
+
+def find_seq_scans(plan):
+    """Relation names of every Seq Scan node in an EXPLAIN (FORMAT JSON) plan tree."""
+    scans = []
+    if plan.get('Node Type') == 'Seq Scan':
+        scans.append(plan.get('Relation Name'))
+    for child in plan.get('Plans', []):
+        scans.extend(find_seq_scans(child))
+    return scans
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the first list page of every routed viewset, as a member of "
+        "the sample project would request it, and report sequential scans."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username to build querysets for (default: first project member).")
+        parser.add_argument('--analyze', action='store_true', help="Run EXPLAIN ANALYZE (executes the queries).")
+        parser.add_argument(
+            '--force-index', action='store_true',
+            help="Plan with enable_seqscan=off; remaining seq scans then mean no usable index exists. "
+                 "Useful on small development databases where the planner prefers seq scans anyway.",
+        )
+        parser.add_argument('--fail-on-seq-scan', action='store_true', help="Exit with an error if any are found.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("This command needs the PostgreSQL backend.")
+
+        user = self.get_user(options['user'])
+        url_kwargs = self.sample_url_kwargs(user)
+
+        offenders = []
+        seen = set()
+        for viewset, actions in iter_routed_viewsets():
+            if viewset in seen or 'list' not in actions:
+                continue
+            seen.add(viewset)
+
+            queryset = self.list_queryset(viewset, user, url_kwargs)
+            plan = self.explain(queryset, options['analyze'], options['force_index'])
+            scans = find_seq_scans(plan)
+
+            cost = plan.get('Total Cost')
+            if scans:
+                offenders.append(viewset.__name__)
+                self.stdout.write(self.style.WARNING(
+                    f"{viewset.__name__:<28} cost={cost:<10} seq scan on: {', '.join(scans)}"
+                ))
+            else:
+                self.stdout.write(f"{viewset.__name__:<28} cost={cost:<10} ok")
+
+        if offenders and options['fail_on_seq_scan']:
+            raise CommandError(f"Sequential scans in: {', '.join(offenders)}")
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"User '{username}' does not exist.")
+        member = ProjectMember.objects.select_related('user').first()
+        if member is None:
+            raise CommandError("No project members found; pass --user.")
+        return member.user
+
+    @staticmethod
+    def sample_url_kwargs(user):
+        """Nested route kwargs pointing at data the user can see."""
+        member = ProjectMember.objects.filter(user=user).first()
+        project_id = member.project_id if member else None
+        story = Story.objects.filter(project_id=project_id).first()
+        ticket = Ticket.objects.filter(story=story).first()
+        comment = TicketComment.objects.filter(ticket=ticket).first()
+        return {
+            'project_pk': project_id,
+            'story_pk': story.pk if story else None,
+            'ticket_pk': ticket.pk if ticket else None,
+            'comment_pk': comment.pk if comment else None,
+        }
+
+    @staticmethod
+    def list_queryset(viewset, user, url_kwargs):
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=user)
+
+        view = viewset()
+        view.action_map = {'get': 'list'}
+        view.action = 'list'
+        view.args = ()
+        view.kwargs = url_kwargs
+        view.format_kwarg = None
+        view.request = view.initialize_request(request)
+        view.headers = {}
+
+        queryset = view.filter_queryset(view.get_queryset())
+        paginator = view.paginator
+        if isinstance(paginator, KeysetPagination):
+            queryset = queryset.order_by(*paginator.get_ordering(reverse=False))
+            return queryset[:paginator.page_size + 1]
+        return queryset[:getattr(paginator, 'page_size', None) or 100]
+
+    @staticmethod
+    def explain(queryset, analyze, force_index):
+        with transaction.atomic():
+            if force_index:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            output = queryset.explain(format='json', analyze=analyze)
+        if isinstance(output, str):
+            output = json.loads(output)
+        return output[0]['Plan']
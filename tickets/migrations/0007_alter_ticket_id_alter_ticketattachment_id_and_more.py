@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:12
+
+import base.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0006_ticket_search_vector_ticketcomment_search_vector_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='id',
+            field=models.UUIDField(default=base.ids.uuid7, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='ticketattachment',
+            name='id',
+            field=models.UUIDField(default=base.ids.uuid7, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='ticketcomment',
+            name='id',
+            field=models.UUIDField(default=base.ids.uuid7, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='tickethistory',
+            name='id',
+            field=models.UUIDField(default=base.ids.uuid7, primary_key=True, serialize=False),
+        ),
+    ]
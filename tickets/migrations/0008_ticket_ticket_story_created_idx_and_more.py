@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:13
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build indexes without blocking writes on live tables.
+    atomic = False
+
+    dependencies = [
+        ('projects', '0009_projectmember_member_user_project_idx_and_more'),
+        ('tickets', '0007_alter_ticket_id_alter_ticketattachment_id_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(models.F('story'), models.OrderBy(models.F('created_at'), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), name='ticket_story_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['story', 'status'], name='ticket_active_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='ticketcomment',
+            index=models.Index(models.F('ticket'), models.OrderBy(models.F('created_at'), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), name='comment_ticket_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='tickethistory',
+            index=models.Index(models.F('ticket'), models.OrderBy(models.F('created_at'), descending=True, nulls_last=True), models.OrderBy(models.F('id'), descending=True), name='history_ticket_created_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL_SQL = [
+    '''
+    UPDATE "Tickets" AS t
+    SET project_id = s.project_id
+    FROM "Project_Stories" AS s
+    WHERE s.id = t.story_id AND t.project_id IS NULL
+    ''',
+    '''
+    UPDATE "Ticket_Comments" AS c
+    SET project_id = t.project_id
+    FROM "Tickets" AS t
+    WHERE t.id = c.ticket_id AND c.project_id IS NULL
+    ''',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_projectmember_member_user_project_idx_and_more'),
+        ('tickets', '0008_ticket_ticket_story_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='project',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tickets', to='projects.project'),
+        ),
+        migrations.AddField(
+            model_name='ticketcomment',
+            name='project',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ticket_comments', to='projects.project'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the index without blocking writes on the live table.
+    atomic = False
+
+    dependencies = [
+        ('projects', '0009_projectmember_member_user_project_idx_and_more'),
+        ('tickets', '0009_ticket_project_ticketcomment_project'),
+    ]
+
+    operations = [
+        # before the AlterField below drops the single-column project index
+        AddIndexConcurrently(
+            model_name='ticket',
+            index=models.Index(fields=['project', 'status'], name='ticket_project_status_idx'),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='project',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='tickets', to='projects.project'),
+        ),
+        migrations.AlterField(
+            model_name='ticketcomment',
+            name='project',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='ticket_comments', to='projects.project'),
+        ),
+    ]
@@ -1,11 +1,18 @@
 from django.db import models
+from django.db.models import F, Q
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
 
 from base.models import BaseModel
+from base.search import search_vector_field
 from projects.models import Story, ProjectMember,Project
 
 class Ticket(BaseModel):
     story = models.ForeignKey(Story, on_delete=models.CASCADE, related_name='ticket')
+    # Copy of story.project so ticket queries don't need to join Project_Stories.
+    # No index of its own: ticket_project_status_idx leads with it.
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tickets', editable=False,
+                                db_index=False)
     title = models.CharField(max_length=100)
     description = models.TextField()
     assigned_member = models.ForeignKey(ProjectMember, on_delete=models.CASCADE, related_name='ticket')
@@ -13,22 +20,68 @@ class Ticket(BaseModel):
     priority = models.CharField(max_length=50)
     type = models.CharField(max_length=50)
     due_date = models.DateField()   
+    search_vector = search_vector_field(('title', 'A'), ('description', 'B'))
 
     class Meta:
         db_table = 'Tickets'
 
         verbose_name = 'Ticket'
         verbose_name_plural = 'Tickets'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='ticket_search_vector_gin'),
+            # Nested ticket list: WHERE story_id = ? ORDER BY created_at DESC NULLS LAST, id DESC
+            models.Index(F('story'), F('created_at').desc(nulls_last=True), F('id').desc(),
+                         name='ticket_story_created_idx'),
+            models.Index(fields=['story', 'status'], condition=Q(is_active=True),
+                         name='ticket_active_status_idx'),
+            models.Index(fields=['project', 'status'], name='ticket_project_status_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_story_id = instance.__dict__.get('story_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        moved = not self._state.adding and self.story_id != getattr(self, '_loaded_story_id', None)
+        if self.project_id is None or moved:
+            self.project_id = self.story.project_id
+        super().save(*args, **kwargs)
+        self._loaded_story_id = self.story_id
+
+        if moved:
+            self.comments.exclude(project_id=self.project_id).update(project_id=self.project_id)
 
 class TicketComment(BaseModel):
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='comments')
+    # Copy of ticket.project for project-wide comment queries (search, activity).
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='ticket_comments', editable=False)
     message = models.TextField()
+    search_vector = search_vector_field(('message', 'A'))
 
     class Meta:
         db_table = 'Ticket_Comments'
 
         verbose_name = 'Ticket Comment'
         verbose_name_plural = 'Ticket Comments'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='comment_search_vector_gin'),
+            models.Index(F('ticket'), F('created_at').desc(nulls_last=True), F('id').desc(),
+                         name='comment_ticket_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_ticket_id = instance.__dict__.get('ticket_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.project_id is None or self.ticket_id != getattr(self, '_loaded_ticket_id', None):
+            self.project_id = self.ticket.project_id
+        super().save(*args, **kwargs)
+        self._loaded_ticket_id = self.ticket_id
 
 class TicketHistory(BaseModel):
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='histories')
@@ -41,6 +94,10 @@ class TicketHistory(BaseModel):
 
         verbose_name = 'Ticket History'
         verbose_name_plural = 'Ticket Histories'
+        indexes = [
+            models.Index(F('ticket'), F('created_at').desc(nulls_last=True), F('id').desc(),
+                         name='history_ticket_created_idx'),
+        ]
 
 class TicketAttachment(BaseModel):
     file = models.FileField(upload_to='ticket_attachments/')
@@ -0,0 +1,54 @@
+from django.contrib.postgres.search import SearchHeadline, SearchRank
+from django.db.models import F
+
+from base.search import SEARCH_CONFIG
+from projects.models import ProjectMember, Story
+from .models import Ticket, TicketComment
+
+HEADLINE_OPTIONS = {
+    'config': SEARCH_CONFIG,
+    'start_sel': '<mark>',
+    'stop_sel': '</mark>',
+    'max_words': 35,
+    'min_words': 15,
+}
+
+
+def member_project_ids(user):
+    return ProjectMember.objects.filter(user=user).values('project_id')
+
+
+def _ranked(queryset, query, headline_field, limit):
+    # The @@ match is served by the GIN index; rank and headline are only
+    # computed for matching rows and Postgres defers the headline until after LIMIT.
+    return (
+        queryset.filter(search_vector=query)
+        .annotate(
+            rank=SearchRank(F('search_vector'), query),
+            headline=SearchHeadline(headline_field, query, **HEADLINE_OPTIONS),
+        )
+        .order_by('-rank', '-created_at')[:limit]
+    )
+
+
+def search_stories(user, query, limit):
+    queryset = Story.objects.filter(project_id__in=member_project_ids(user)).only(
+        'id', 'project_id', 'title', 'status', 'created_at',
+    )
+    return _ranked(queryset, query, 'description', limit)
+
+
+def search_tickets(user, query, limit):
+    queryset = Ticket.objects.filter(project_id__in=member_project_ids(user)).only(
+        'id', 'project_id', 'story_id', 'title', 'status', 'priority', 'created_at',
+    )
+    return _ranked(queryset, query, 'description', limit)
+
+
+def search_comments(user, query, limit):
+    queryset = (
+        TicketComment.objects.filter(project_id__in=member_project_ids(user))
+        .annotate(story=F('ticket__story_id'))
+        .only('id', 'project_id', 'ticket_id', 'created_at')
+    )
+    return _ranked(queryset, query, 'message', limit)
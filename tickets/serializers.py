@@ -4,26 +4,54 @@ from rest_framework import serializers
 from datetime import date
 
 from projects.models import Story,ProjectMember
+from projects.serializers import ProjectMemberSerializer
 from base.serializers import BaseModelSerializer,BaseSerializer
 from .models import Ticket,TicketAttachment,TicketComment,TicketHistory
+from . import history
 
 User = get_user_model()
 
 
 
-class TicketSerializer(BaseModelSerializer):
+class TicketHistoryMixin:
+    """
+    Records a TicketHistory row per changed field on update. The old values
+    come from the instance being updated, so nothing is re-read.
+    """
+
+    def update(self, instance, validated_data):
+        before = history.snapshot(instance)
+        instance = super().update(instance, validated_data)
+        request = self.context.get('request')
+        history.record_changes([(instance, before)], getattr(request, 'user', None))
+        return instance
+
+
+class TicketSerializer(TicketHistoryMixin, BaseModelSerializer):
     class Meta(BaseModelSerializer.Meta):
         model = Ticket
-        fields = ['id','story','title','description','assigned_member','status','priority','type','due_date'
+        fields = ['id','project','story','title','description','assigned_member','status','priority','type','due_date'
                   ,'created_at', 'updated_at', 'created_by', 'updated_by', 'is_active']
         
 
-class TicketCreateUpdateSerializer(BaseModelSerializer):
+class TicketSearchResultSerializer(BaseModelSerializer):
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta(BaseModelSerializer.Meta):
+        model = Ticket
+        fields = ['id', 'project', 'story', 'title', 'status', 'priority', 'rank', 'headline']
+
+
+class TicketCreateUpdateSerializer(TicketHistoryMixin, BaseModelSerializer):
     
     class Meta(BaseModelSerializer.Meta):
         model = Ticket
         fields = ['story','title','description','assigned_member','status','priority','type','due_date']
 
+    def validate_story(self, value):
+        return self.check_url_parent(value, pk='story_pk', project_id='project_pk')
+
     def validate(self,attrs):
         story_id = attrs['story']
         assigned_member_id = attrs['assigned_member']
@@ -31,11 +59,11 @@ class TicketCreateUpdateSerializer(BaseModelSerializer):
             if not story_id:
                 story_id = self.instance.story
             if not assigned_member_id:
-                assigned_member_id = self.assigned_member
+                assigned_member_id = self.instance.assigned_member
         if story_id and assigned_member_id:
             existing = Ticket.objects.filter(story=story_id,assigned_member=assigned_member_id)
             if self.instance:
-                existing.exclude(pk=self.instance.pk)
+                existing = existing.exclude(pk=self.instance.pk)
             if existing.exists():
                 raise serializers.ValidationError("A ticket with same story and same user already exists")
             
@@ -50,17 +78,44 @@ class TicketCreateUpdateSerializer(BaseModelSerializer):
     def update(self, instance, validated_data):
         return super().update(instance, validated_data)
     
+class TicketBulkUpdateSerializer(BaseSerializer):
+    id = serializers.UUIDField()
+    assigned_member = serializers.UUIDField(required=False)
+    status = serializers.CharField(max_length=50, required=False)
+    priority = serializers.CharField(max_length=50, required=False)
+    type = serializers.CharField(max_length=50, required=False)
+    due_date = serializers.DateField(required=False)
+
+    def validate_due_date(self, value):
+        if value < date.today():
+            raise serializers.ValidationError("Due date should be >= today's date")
+        return value
+
+
 class TicketCommentSerializer(BaseModelSerializer):
     class Meta(BaseModelSerializer.Meta):
         model = TicketComment
         fields = ['id','ticket','message','created_at', 'updated_at', 'created_by', 'updated_by', 'is_active']
         
 
+class TicketCommentSearchResultSerializer(BaseModelSerializer):
+    story = serializers.UUIDField(read_only=True)
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
+
+    class Meta(BaseModelSerializer.Meta):
+        model = TicketComment
+        fields = ['id', 'project', 'story', 'ticket', 'rank', 'headline']
+
+
 class TicketCommentCreateUpdateSerializer(BaseModelSerializer):
     class Meta(BaseModelSerializer.Meta):
         model = TicketComment
         fields = ['ticket','message']
 
+    def validate_ticket(self, value):
+        return self.check_url_parent(value, pk='ticket_pk', story_id='story_pk', project_id='project_pk')
+
     def validate(self, attrs):
         return super().validate(attrs)
     
@@ -90,4 +145,31 @@ class TicketAttachmentCreateUpdateSerializer(BaseModelSerializer):
         return super().update(instance, validated_data)
 
 
-    
\ No newline at end of file
+    
+
+
+class TicketHistorySerializer(BaseModelSerializer):
+    class Meta(BaseModelSerializer.Meta):
+        model = TicketHistory
+        fields = ['id', 'field_changed', 'old_value', 'new_value', 'created_at', 'created_by']
+
+
+class TicketStorySummarySerializer(BaseModelSerializer):
+    class Meta(BaseModelSerializer.Meta):
+        model = Story
+        fields = ['id', 'project', 'title', 'status']
+
+
+class TicketDetailSerializer(TicketSerializer):
+    story = TicketStorySummarySerializer(read_only=True)
+    assigned_member = ProjectMemberSerializer(read_only=True)
+
+    class Meta(TicketSerializer.Meta):
+        pass
+
+
+class TicketCommentDetailSerializer(TicketCommentSerializer):
+    attachments = TicketAttachmentSerializer(many=True, read_only=True)
+
+    class Meta(TicketCommentSerializer.Meta):
+        fields = TicketCommentSerializer.Meta.fields + ['attachments']
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from projects.models import Story
+from .models import Ticket, TicketComment
+
+
+@receiver(post_save, sender=Story)
+def sync_project_on_story_move(sender, instance, created, **kwargs):
+    """Keep the denormalized project of the story's tickets and comments in step with the story."""
+    if created or not getattr(instance, 'project_moved', False):
+        return
+    Ticket.objects.filter(story=instance).exclude(project_id=instance.project_id).update(
+        project_id=instance.project_id
+    )
+    TicketComment.objects.filter(ticket__story=instance).exclude(project_id=instance.project_id).update(
+        project_id=instance.project_id
+    )
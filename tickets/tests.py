@@ -1,3 +1,348 @@
-from django.test import TestCase
+import json
+from datetime import date
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from base.compiled import compile_read_plan
+from base.testing import QueryBudgetTestCase
+from projects.models import Project, ProjectMember, Story
+from projects.serializers import ProjectMemberSerializer, StorySerializer
+from .models import Ticket, TicketAttachment, TicketComment, TicketHistory
+from .serializers import TicketAttachmentSerializer, TicketSerializer
+from .views import SearchView, TicketAttachmentView, TicketCommentView, TicketViewSet
+
+User = get_user_model()
+
+
+class TicketQueryBudgetTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner')
+        self.authenticate(self.user)
+        self.project = Project.objects.create(name='Project', description='desc', status='active')
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        self.story = Story.objects.create(project=self.project, title='Story', description='desc', status='todo')
+        for i in range(3):
+            user = User.objects.create_user(f'member{i}')
+            member = ProjectMember.objects.create(project=self.project, user=user, role='developer')
+            ticket = Ticket.objects.create(
+                story=self.story, title=f'Ticket {i}', description='desc', assigned_member=member,
+                status='todo', priority='high', type='bug', due_date=date.today(), created_by=user,
+            )
+            comment = TicketComment.objects.create(ticket=ticket, message='comment', created_by=user)
+            TicketAttachment.objects.create(comment=comment, file='ticket_attachments/file.txt', created_by=user)
+        for i in range(2):
+            user = User.objects.create_user(f'commenter{i}')
+            comment = TicketComment.objects.create(ticket=ticket, message='comment', created_by=user)
+            TicketAttachment.objects.create(comment=comment, file='ticket_attachments/file.txt', created_by=user)
+        self.ticket = ticket
+        self.comment = comment
+        self.url = f'/tickets/projects/{self.project.pk}/stories/{self.story.pk}/tickets/'
+
+    def test_ticket_list(self):
+        with self.assertQueryBudget(TicketViewSet, 'list'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_ticket_retrieve(self):
+        with self.assertQueryBudget(TicketViewSet, 'retrieve'):
+            response = self.client.get(f'{self.url}{self.ticket.pk}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_ticket_details(self):
+        for i in range(3):
+            TicketHistory.objects.create(ticket=self.ticket, field_changed='status', old_value='todo',
+                                         new_value=f'step {i}', created_by=self.user)
+        with self.assertQueryBudget(TicketViewSet, 'details'):
+            response = self.client.get(f'{self.url}{self.ticket.pk}/details/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['ticket']['story']['title'], 'Story')
+        self.assertEqual(response.data['ticket']['assigned_member']['user_first_name'], 'member2')
+        self.assertEqual(len(response.data['comments']['results']), 3)
+        self.assertEqual(len(response.data['comments']['results'][0]['attachments']), 1)
+        self.assertEqual(response.data['history'][0]['new_value'], 'step 2')
+
+    def test_ticket_partial_update_records_history(self):
+        url = f'{self.url}{self.ticket.pk}/'
+        with self.assertQueryBudget(TicketViewSet, 'partial_update') as recorder:
+            response = self.client.patch(url, {'status': 'done', 'priority': 'low'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum('INSERT INTO "Ticket_Histories"' in sql for sql in recorder.queries), 1)
+        changes = dict(self.ticket.histories.values_list('field_changed', 'new_value'))
+        self.assertEqual(changes, {'status': 'done', 'priority': 'low'})
+        self.assertEqual(self.ticket.histories.filter(old_value='todo').count(), 1)
+
+    def test_ticket_update_keeping_the_assignee_records_history(self):
+        data = {'story': str(self.story.pk), 'title': 'Renamed', 'description': 'desc',
+                'assigned_member': str(self.ticket.assigned_member_id), 'status': 'done', 'priority': 'high',
+                'type': 'bug', 'due_date': str(date.today())}
+        with self.assertQueryBudget(TicketViewSet, 'update'):
+            response = self.client.put(f'{self.url}{self.ticket.pk}/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+        changes = dict(self.ticket.histories.values_list('field_changed', 'new_value'))
+        self.assertEqual(changes, {'title': 'Renamed', 'status': 'done'})
+
+        other = Ticket.objects.filter(story=self.story).exclude(pk=self.ticket.pk).first()
+        data['assigned_member'] = str(other.assigned_member_id)
+        response = self.client.put(f'{self.url}{self.ticket.pk}/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_ticket_bulk_update(self):
+        tickets = list(Ticket.objects.filter(story=self.story))
+        # rotate the assignees, so each member still has one ticket in the story
+        members = [t.assigned_member_id for t in tickets[1:] + tickets[:1]]
+        data = [{'id': str(t.pk), 'status': 'done', 'assigned_member': str(member_id)}
+                for t, member_id in zip(tickets, members)]
+        with self.assertQueryBudget(TicketViewSet, 'bulk_update') as recorder:
+            response = self.client.patch(f'{self.url}bulk/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum('INSERT INTO "Ticket_Histories"' in sql for sql in recorder.queries), 1)
+        self.assertEqual(
+            [Ticket.objects.get(pk=t.pk).assigned_member_id for t in tickets], members
+        )
+        self.assertEqual(Ticket.objects.filter(story=self.story, status='done').count(), 3)
+        # three status changes plus three assignee changes
+        self.assertEqual(TicketHistory.objects.filter(ticket__story=self.story).count(), 6)
+
+    def test_ticket_bulk_update_keeps_one_ticket_per_member(self):
+        tickets = list(Ticket.objects.filter(story=self.story))
+        member_id = str(tickets[0].assigned_member_id)
+        data = [{'id': str(tickets[1].pk), 'assigned_member': member_id}]
+        response = self.client.patch(f'{self.url}bulk/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        owner = ProjectMember.objects.get(user=self.user)
+        data = [{'id': str(t.pk), 'assigned_member': str(owner.pk)} for t in tickets[:2]]
+        response = self.client.patch(f'{self.url}bulk/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(TicketHistory.objects.exists())
+
+    def test_ticket_bulk_update_rejects_duplicate_ids(self):
+        data = [{'id': str(self.ticket.pk), 'status': 'done'}, {'id': str(self.ticket.pk), 'status': 'blocked'}]
+        response = self.client.patch(f'{self.url}bulk/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_ticket_bulk_update_rejects_unknown_ticket(self):
+        data = [{'id': str(self.story.pk), 'status': 'done'}]
+        response = self.client.patch(f'{self.url}bulk/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_ticket_list_sparse_fields(self):
+        with self.assertQueryBudget(TicketViewSet, 'list') as recorder:
+            response = self.client.get(self.url, {'fields': 'id,title,status'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'status'})
+        select = next(sql for sql in recorder.queries if 'FROM "Tickets"' in sql)
+        self.assertNotIn('"description"', select)
+        self.assertNotIn('auth_user', select)
+
+    def test_ticket_list_exclude(self):
+        with self.assertQueryBudget(TicketViewSet, 'list') as recorder:
+            response = self.client.get(self.url, {'exclude': 'description,created_by,updated_by'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('description', response.data['results'][0])
+        self.assertIn('title', response.data['results'][0])
+        select = next(sql for sql in recorder.queries if 'FROM "Tickets"' in sql)
+        self.assertNotIn('"description"', select)
+        self.assertNotIn('auth_user', select)
+
+    def test_ticket_details_nested_fields(self):
+        with self.assertQueryBudget(TicketViewSet, 'details') as recorder:
+            response = self.client.get(f'{self.url}{self.ticket.pk}/details/',
+                                       {'fields': 'id,story.title,assigned_member.user_first_name'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['ticket'], {
+            'id': str(self.ticket.pk),
+            'story': {'title': 'Story'},
+            'assigned_member': {'user_first_name': 'member2'},
+        })
+        select = next(sql for sql in recorder.queries if 'FROM "Tickets"' in sql)
+        self.assertNotIn('"Project_Stories"."description"', select)
+        self.assertNotIn('"Tickets"."description"', select)
+
+    def assertSameOutput(self, serializer_class, queryset):
+        plan = compile_read_plan(serializer_class, queryset)
+        self.assertIsNotNone(plan)
+        expected = [dict(item) for item in serializer_class(queryset, many=True).data]
+        self.assertEqual(plan.render(plan.values(queryset)), expected)
+
+    def test_matches_serializers(self):
+        Ticket.objects.filter(pk=self.ticket.pk).update(created_by=None)
+        self.assertSameOutput(TicketSerializer, Ticket.objects.all())
+        self.assertSameOutput(StorySerializer, Story.objects.all())
+        self.assertSameOutput(ProjectMemberSerializer, ProjectMember.objects.all())
+
+    def test_uncompilable_serializer(self):
+        self.assertIsNone(compile_read_plan(TicketAttachmentSerializer, TicketAttachment.objects.all()))
+
+    def test_list_uses_values(self):
+        with self.assertQueryBudget(TicketViewSet, 'list') as recorder:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        select = next(sql for sql in recorder.queries if 'FROM "Tickets"' in sql)
+        self.assertIn('AS "pk"', select)
+        expected = TicketSerializer(Ticket.objects.filter(story=self.story), many=True).data
+        self.assertEqual(response.data['results'], [dict(item) for item in expected])
+
+    def test_ticket_list_stream(self):
+        response = self.client.get(self.url, {'stream': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row['id'] for row in rows},
+                         {str(pk) for pk in Ticket.objects.filter(story=self.story).values_list('pk', flat=True)})
+
+    def test_comment_list(self):
+        with self.assertQueryBudget(TicketCommentView, 'list'):
+            response = self.client.get(f'{self.url}{self.ticket.pk}/comments/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_create(self):
+        data = {'ticket': str(self.ticket.pk), 'message': 'new comment'}
+        with self.assertQueryBudget(TicketCommentView, 'create'):
+            response = self.client.post(f'{self.url}{self.ticket.pk}/comments/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_parents_in_the_body_must_match_the_url(self):
+        other_story = Story.objects.create(project=self.project, title='Other', description='desc',
+                                           status='todo')
+        other_ticket = Ticket.objects.create(
+            story=other_story, title='Other', description='desc', assigned_member=self.ticket.assigned_member,
+            status='todo', priority='high', type='bug', due_date=date.today(),
+        )
+        response = self.client.post(f'{self.url}{self.ticket.pk}/comments/',
+                                    {'ticket': str(other_ticket.pk), 'message': 'misplaced'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        data = {'story': str(other_story.pk), 'title': 'New', 'description': 'desc',
+                'assigned_member': str(ProjectMember.objects.get(user=self.user).pk), 'status': 'todo', 'priority': 'low',
+                'type': 'task', 'due_date': str(date.today())}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Ticket.objects.filter(title='New').exists())
+
+    def test_attachment_list(self):
+        with self.assertQueryBudget(TicketAttachmentView, 'list'):
+            response = self.client.get(f'{self.url}{self.ticket.pk}/attachments/')
+        self.assertEqual(response.status_code, 200)
+
+
+class DenormalizedProjectTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        user = User.objects.create_user('mover')
+        self.source = Project.objects.create(name='Source', description='desc', status='active')
+        self.target = Project.objects.create(name='Target', description='desc', status='active')
+        member = ProjectMember.objects.create(project=self.source, user=user, role='owner')
+        self.story = Story.objects.create(project=self.source, title='Story', description='desc', status='todo')
+        self.ticket = Ticket.objects.create(
+            story=self.story, title='Ticket', description='desc', assigned_member=member,
+            status='todo', priority='high', type='bug', due_date=date.today(),
+        )
+        self.comment = TicketComment.objects.create(ticket=self.ticket, message='comment')
+
+    def test_project_is_copied_on_create(self):
+        self.assertEqual(self.ticket.project_id, self.source.pk)
+        self.assertEqual(self.comment.project_id, self.source.pk)
+
+    def test_story_move_updates_tickets_and_comments(self):
+        self.story.project = self.target
+        self.story.save()
+
+        self.ticket.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.assertEqual(self.ticket.project_id, self.target.pk)
+        self.assertEqual(self.comment.project_id, self.target.pk)
+
+    def test_ticket_move_updates_comments(self):
+        story = Story.objects.create(project=self.target, title='Other', description='desc', status='todo')
+        self.ticket.story = story
+        self.ticket.save()
+
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.project_id, self.target.pk)
+
+
+class SearchTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('searcher')
+        self.authenticate(self.user)
+        self.project = Project.objects.create(name='Project', description='desc', status='active')
+        member = ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        story = Story.objects.create(project=self.project, title='Payment gateway', description='Card payments',
+                                     status='todo')
+        self.ticket = Ticket.objects.create(
+            story=story, title='Refund fails', description='Refunds for card payments time out',
+            assigned_member=member, status='todo', priority='high', type='bug', due_date=date.today(),
+        )
+        Ticket.objects.create(
+            story=story, title='Payment receipts', description='Email a receipt',
+            assigned_member=member, status='todo', priority='low', type='task', due_date=date.today(),
+        )
+        TicketComment.objects.create(ticket=self.ticket, message='Reproduced the refund timeout')
+
+        other_project = Project.objects.create(name='Other', description='desc', status='active')
+        other_user = User.objects.create_user('outsider')
+        other_member = ProjectMember.objects.create(project=other_project, user=other_user, role='owner')
+        other_story = Story.objects.create(project=other_project, title='Refund', description='refund',
+                                           status='todo')
+        Ticket.objects.create(
+            story=other_story, title='Refund', description='refund', assigned_member=other_member,
+            status='todo', priority='low', type='task', due_date=date.today(),
+        )
+
+    def test_results_are_ranked_and_scoped_to_member_projects(self):
+        with self.assertQueryBudget(SearchView, 'get'):
+            response = self.client.get('/tickets/search/', {'q': 'refund'})
+        self.assertEqual(response.status_code, 200)
+
+        tickets = response.data['results']['tickets']
+        self.assertEqual([t['id'] for t in tickets], [str(self.ticket.pk)])
+        self.assertIn('<mark>', tickets[0]['headline'])
+        self.assertEqual(len(response.data['results']['comments']), 1)
+        self.assertEqual(response.data['results']['stories'], [])
+
+    def test_title_matches_rank_above_description_matches(self):
+        response = self.client.get('/tickets/search/', {'q': 'payment', 'type': 'tickets'})
+        tickets = response.data['results']['tickets']
+        self.assertEqual([t['title'] for t in tickets], ['Payment receipts', 'Refund fails'])
+
+    def test_query_is_required(self):
+        response = self.client.get('/tickets/search/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_limit_is_clamped(self):
+        response = self.client.get('/tickets/search/', {'q': 'payment', 'type': 'tickets', 'limit': -5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']['tickets']), 1)
+
+    def test_list_search_uses_search_vector(self):
+        url = f'/tickets/projects/{self.project.pk}/stories/{self.ticket.story_id}/tickets/'
+        response = self.client.get(url, {'search': 'refunds'})
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class ExplainViewsetsCommandTests(QueryBudgetTestCase):
+
+    def test_nested_lists_use_indexes(self):
+        user = User.objects.create_user('explainer')
+        project = Project.objects.create(name='Project', description='desc', status='active')
+        member = ProjectMember.objects.create(project=project, user=user, role='owner')
+        story = Story.objects.create(project=project, title='Story', description='desc', status='todo')
+        ticket = Ticket.objects.create(
+            story=story, title='Ticket', description='desc', assigned_member=member,
+            status='todo', priority='high', type='bug', due_date=date.today(),
+        )
+        TicketComment.objects.create(ticket=ticket, message='comment')
+
+        out = StringIO()
+        call_command('explain_viewsets', '--user', 'explainer', '--force-index', stdout=out)
+        report = {line.split()[0]: line for line in out.getvalue().splitlines()}
+
+        for viewset in ('TicketViewSet', 'TicketCommentView', 'StoryView', 'ProjectMemberViewSet'):
+            self.assertTrue(report[viewset].endswith('ok'), report[viewset])
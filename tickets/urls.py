@@ -3,7 +3,7 @@ from rest_framework_nested.routers import NestedDefaultRouter
 from rest_framework.routers import DefaultRouter
 
 from projects.views import ProjectView, StoryView
-from .views import TicketViewSet, TicketCommentView, TicketAttachmentView
+from .views import TicketViewSet, TicketCommentView, TicketAttachmentView, SearchView
 
 router = DefaultRouter()
 router.register(r'projects', ProjectView, basename='project')
@@ -19,6 +19,7 @@ tickets_router.register(r'comments', TicketCommentView, basename='ticket-comment
 tickets_router.register(r'attachments', TicketAttachmentView, basename='ticket-attachments')
 
 urlpatterns = [
+    path('search/', SearchView.as_view(), name='search'),
     path('', include(router.urls)),
     path('', include(projects_router.urls)),
     path('', include(stories_router.urls)),
@@ -1,36 +1,163 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
 from rest_framework import viewsets,status,permissions,filters
+from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 
 
-from .models import Ticket,TicketComment,TicketAttachment
+from .models import Ticket,TicketComment,TicketAttachment,TicketHistory
 from .serializers import (TicketCreateUpdateSerializer,TicketSerializer,TicketCommentCreateUpdateSerializer,TicketCommentSerializer
-            ,TicketAttachmentCreateUpdateSerializer,TicketAttachmentSerializer)
-from base.views import BaseViewSet
+            ,TicketAttachmentCreateUpdateSerializer,TicketAttachmentSerializer,TicketSearchResultSerializer,
+            TicketCommentSearchResultSerializer,TicketDetailSerializer,TicketCommentDetailSerializer,
+            TicketHistorySerializer,TicketBulkUpdateSerializer)
+from . import history as ticket_history
+from .search import search_comments, search_stories, search_tickets
+from base.pagination import KeysetPagination
+from base.search import build_search_query
+from base.views import BaseViewSet, CompiledListMixin
+from projects.models import ProjectMember
+from projects.permissions import IsProjectMember
+from projects.serializers import StorySearchResultSerializer
 
 
-class TicketViewSet(BaseViewSet,viewsets.ModelViewSet):
+class TicketViewSet(CompiledListMixin, BaseViewSet, viewsets.ModelViewSet):
     
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, IsProjectMember]
+    query_budget = {'list': 3, 'retrieve': 3, 'details': 6, 'create': 6, 'update': 8, 'partial_update': 5,
+                    'bulk_update': 6, 'destroy': 8}
+    read_replica = True
     
     filterset_fields = ['status','is_active']
-    search_fields = ['name','description']
-    ordering_fields = ['name','start_date','end_date','created_at']
+    search_fields = ['title','description']
+    search_vector_field = 'search_vector'
+    ordering_fields = ['title','status','priority','due_date','created_at']
+
+    history_limit = 20
 
     def get_serializer_class(self):
         if self.action in ['create','update']:
             return TicketCreateUpdateSerializer
+        if self.action == 'details':
+            return TicketDetailSerializer
         return TicketSerializer
         
     def get_queryset(self):
         project_id = self.kwargs.get('project_pk')
         story_id = self.kwargs.get('story_pk')
 
-        return Ticket.objects.filter(
+        queryset = Ticket.objects.select_related('created_by', 'updated_by').filter(
             story_id=story_id,
-            story__project_id=project_id
+            project_id=project_id
         )
+        if self.action == 'details':
+            queryset = queryset.select_related('story', 'assigned_member__user')
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def details(self, request, *args, **kwargs):
+        """
+        Everything the ticket page shows in one response: the ticket with
+        its story and assignee, a page of comments with their attachments
+        (`cursor` / `page_size` as on the comment list) and the latest history.
+        """
+        ticket = self.get_object()
+
+        comments = TicketComment.objects.filter(ticket=ticket).select_related(
+            'created_by', 'updated_by'
+        ).prefetch_related(
+            Prefetch('attachments', queryset=TicketAttachment.objects.select_related('created_by', 'updated_by'))
+        )
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(comments, request, view=self)
+        comments_data = paginator.get_paginated_response(
+            TicketCommentDetailSerializer(page, many=True).data
+        ).data
+
+        history = TicketHistory.objects.filter(ticket=ticket).select_related('created_by').order_by(
+            *KeysetPagination.get_ordering(reverse=False)
+        )[:self.history_limit]
+
+        return Response({
+            'ticket': self.get_serializer(ticket).data,
+            'comments': comments_data,
+            'history': TicketHistorySerializer(history, many=True).data,
+        }, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['patch'], url_path='bulk')
+    def bulk_update(self, request, *args, **kwargs):
+        """
+        Update several of the story's tickets at once. Takes a list of
+        `{"id": ..., <field>: <value>}` objects; the tickets are written with
+        one bulk UPDATE and their history with one bulk INSERT.
+        """
+        serializer = TicketBulkUpdateSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        changes = {item.pop('id'): item for item in serializer.validated_data}
+        if len(changes) != len(serializer.validated_data):
+            return Response({
+                'message': 'Each ticket may appear only once'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        member_ids = {item['assigned_member'] for item in changes.values() if 'assigned_member' in item}
+        if member_ids:
+            found = set(ProjectMember.objects.filter(
+                project_id=self.kwargs.get('project_pk'), id__in=member_ids
+            ).values_list('id', flat=True))
+            if member_ids - found:
+                return Response({
+                    'message': 'Assigned members must belong to this project',
+                    'error': sorted(str(pk) for pk in member_ids - found)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # Lock the whole story, not just the batch: the one-ticket-per-member
+            # check below reads the other tickets, and a concurrent bulk update
+            # must not reassign one of them in between.
+            story_tickets = list(self.get_queryset().select_for_update(of=('self',)).order_by('pk'))
+            tickets = [ticket for ticket in story_tickets if ticket.pk in changes]
+            missing = set(changes) - {ticket.pk for ticket in tickets}
+            if missing:
+                return Response({
+                    'message': 'Tickets not found in this story',
+                    'error': sorted(str(pk) for pk in missing)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            if member_ids:
+                # one ticket per (story, assigned member), as TicketCreateUpdateSerializer enforces
+                assignees = {
+                    ticket.pk: changes.get(ticket.pk, {}).get('assigned_member', ticket.assigned_member_id)
+                    for ticket in story_tickets
+                }
+                reassigned = {assignees[pk] for pk, item in changes.items() if 'assigned_member' in item}
+                counts = Counter(assignees.values())
+                clashing = {member_id for member_id in reassigned if counts[member_id] > 1}
+                if clashing:
+                    return Response({
+                        'message': 'A ticket with same story and same user already exists',
+                        'error': sorted(str(pk) for pk in clashing)
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+            fields = {'updated_by', 'updated_at'}
+            before = []
+            now = timezone.now()
+            for ticket in tickets:
+                before.append((ticket, ticket_history.snapshot(ticket)))
+                for name, value in changes[ticket.pk].items():
+                    setattr(ticket, 'assigned_member_id' if name == 'assigned_member' else name, value)
+                    fields.add(name)
+                ticket.updated_by = request.user
+                ticket.updated_at = now
+
+            Ticket.objects.bulk_update(tickets, sorted(fields))
+            ticket_history.record_changes(before, request.user)
+
+        return Response(TicketSerializer(tickets, many=True).data, status=status.HTTP_200_OK)
+
     def create(self,request,*args,**kwargs):
         try:
             serializer = self.get_serializer(data=request.data)
@@ -54,15 +181,21 @@ class TicketViewSet(BaseViewSet,viewsets.ModelViewSet):
 
 class TicketCommentView(BaseViewSet,viewsets.ModelViewSet):
     
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, IsProjectMember]
+    query_budget = {'list': 3, 'retrieve': 3, 'create': 4, 'update': 5, 'partial_update': 4, 'destroy': 5}
+    read_replica = True
     filterset_fields = ['is_active']
-    search_fields = ['name','description']
-    ordering_fields = ['name','start_date','end_date','created_at']
+    search_fields = ['message']
+    search_vector_field = 'search_vector'
+    ordering_fields = ['created_at']
 
 
     def get_queryset(self):
         ticket_id = self.kwargs.get('ticket_pk')
-        return TicketComment.objects.filter(ticket_id=ticket_id)
+        return TicketComment.objects.select_related('created_by', 'updated_by').filter(
+            ticket_id=ticket_id,
+            project_id=self.kwargs.get('project_pk')
+        )
 
     def get_serializer_class(self):
         if self.action in ['create','update']:
@@ -89,14 +222,19 @@ class TicketCommentView(BaseViewSet,viewsets.ModelViewSet):
         
 class TicketAttachmentView(BaseViewSet,viewsets.ModelViewSet):
     
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, IsProjectMember]
+    query_budget = {'list': 3, 'retrieve': 3, 'create': 4, 'update': 5, 'partial_update': 4, 'destroy': 4}
+    read_replica = True
     filterset_fields = ['is_active']
-    search_fields = ['name','description']
-    ordering_fields = ['name','start_date','end_date','created_at']
+    search_fields = ['file','comment__message']
+    ordering_fields = ['created_at']
 
     def get_queryset(self):
         ticket_id = self.kwargs.get('ticket_pk')
-        return TicketAttachment.objects.filter(comment__ticket_id=ticket_id)
+        return TicketAttachment.objects.select_related('created_by', 'updated_by').filter(
+            comment__ticket_id=ticket_id,
+            comment__project_id=self.kwargs.get('project_pk')
+        )
 
 
 
@@ -122,3 +260,53 @@ class TicketAttachmentView(BaseViewSet,viewsets.ModelViewSet):
                 'message': 'Error creating project',
                 'error': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
+
+
+class SearchView(APIView):
+    """
+    Ranked full-text search over the stories, tickets and comments of the
+    projects the caller is a member of.
+
+    Query params:
+        q: search text (websearch syntax)
+        type: comma separated subset of stories,tickets,comments
+        limit: results per type, capped at max_limit
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'get': 4}
+    default_limit = 10
+    max_limit = 50
+
+    search_types = {
+        'stories': (search_stories, StorySearchResultSerializer),
+        'tickets': (search_tickets, TicketSearchResultSerializer),
+        'comments': (search_comments, TicketCommentSearchResultSerializer),
+    }
+
+    def get(self, request, *args, **kwargs):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({
+                'message': 'Query parameter q is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        requested = request.query_params.get('type')
+        types = [t.strip() for t in requested.split(',')] if requested else list(self.search_types)
+        unknown = [t for t in types if t not in self.search_types]
+        if unknown:
+            return Response({
+                'message': f'Unknown search type: {", ".join(unknown)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+
+        query = build_search_query(text)
+        results = {}
+        for search_type in types:
+            search, serializer_class = self.search_types[search_type]
+            results[search_type] = serializer_class(search(request.user, query, limit), many=True).data
+
+        return Response({'query': text, 'results': results}, status=status.HTTP_200_OK)
@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.base import ModelState
+from django.utils.functional import LazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import ACTIVE_CLAIM, TOKEN_VERSION_CLAIM, USERNAME_CLAIM, get_token_version
+
+User = get_user_model()
+
+
+class LazyTokenUser(LazyObject):
+    """
+    The request user for a token with embedded claims. Its id, username and
+    active flag come from the token. Anything else the views touch (email,
+    is_staff, related objects, save()) loads the User row on first use.
+    It passes isinstance() checks, so it can be used in filters and assigned
+    to foreign keys without being loaded.
+    """
+
+    def __init__(self, token):
+        super().__init__()
+        self.__dict__['_token'] = token
+        self.__dict__['_user_id'] = User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+
+    def _setup(self):
+        try:
+            self._wrapped = User._default_manager.get(pk=self._user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+    def _loaded(self):
+        return self._wrapped is not empty
+
+    def __getattr__(self, name):
+        # A freshly loaded user only has the attributes its class defines
+        # (plus _state, below); probes for anything else, like the
+        # hasattr(value, 'resolve_expression') done by QuerySet.filter(),
+        # must not cost a query.
+        if not self._loaded() and not hasattr(User, name):
+            raise AttributeError(name)
+        if not self._loaded():
+            self._setup()
+        return getattr(self._wrapped, name)
+
+    __class__ = property(lambda self: User)
+    _meta = User._meta
+    is_authenticated = True
+    is_anonymous = False
+
+    @property
+    def _state(self):
+        if self._loaded():
+            return self._wrapped._state
+        if '_model_state' not in self.__dict__:
+            state = ModelState()
+            state.db, state.adding = DEFAULT_DB_ALIAS, False
+            self.__dict__['_model_state'] = state
+        return self.__dict__['_model_state']
+
+    @property
+    def pk(self):
+        return self._wrapped.pk if self._loaded() else self._user_id
+
+    id = pk
+
+    def _is_pk_set(self, meta=None):
+        return self.pk is not None
+
+    @property
+    def username(self):
+        return self._wrapped.username if self._loaded() else self._token[USERNAME_CLAIM]
+
+    @property
+    def is_active(self):
+        return self._wrapped.is_active if self._loaded() else self._token[ACTIVE_CLAIM]
+
+    def get_username(self):
+        return self.username
+
+    def __str__(self):
+        return self.username
+
+    def __repr__(self):
+        return f'<{type(self).__name__}: {self.pk}>'
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        if not hasattr(other, '_meta') or other._meta.concrete_model is not User._meta.concrete_model:
+            return NotImplemented
+        return self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __copy__(self):
+        return type(self)(self._token)
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request User query: tokens issued as
+    users.tokens.UserRefreshToken carry the user's id, username, active flag
+    and token version, and authenticate as a LazyTokenUser once the version
+    is checked against the cache. Older tokens without those claims are
+    authenticated the usual way.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not validated_token.get(ACTIVE_CLAIM, False):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        user = LazyTokenUser(validated_token)
+        if validated_token[TOKEN_VERSION_CLAIM] < get_token_version(user.pk):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        return user
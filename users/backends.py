@@ -0,0 +1,38 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+
+User = get_user_model()
+
+
+class RehashingModelBackend(ModelBackend):
+    """
+    ModelBackend that stores a rehashed password (new hasher or cost
+    parameters, see users.hashers) with a queryset update. user.save()
+    would revoke the user's tokens (users.signals), and a rehash isn't a
+    credential change.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # hash anyway so unknown usernames take as long as wrong passwords
+            make_password(password)
+            return None
+
+        def rehash(raw_password):
+            user.password = make_password(raw_password)
+            User._default_manager.filter(pk=user.pk).update(password=user.password)
+
+        if check_password(password, user.password, setter=rehash) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        return await sync_to_async(self.authenticate)(request, username, password, **kwargs)
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+PER_PROCESS_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_token_version_cache(app_configs, **kwargs):
+    """
+    Token versions are cached without expiry, so with a per-process cache a
+    worker that didn't handle the revocation keeps accepting revoked tokens.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PER_PROCESS_CACHES:
+        return []
+    return [Error(
+        f"The default cache ({backend}) isn't shared between processes, so token "
+        f"revocations only reach the worker that made them.",
+        hint="Set REDIS_URL (or CACHE_DIR on a single host).",
+        id='users.E001',
+    )]
@@ -0,0 +1,62 @@
+"""
+Password hashers whose cost parameters come from settings.PASSWORD_HASHING.
+
+They keep Django's algorithm names, so existing hashes verify unchanged,
+and Django's must_update() compares each stored hash with the configured
+parameters: changing a parameter, or the preferred hasher (first in
+PASSWORD_HASHERS), rehashes every password at its owner's next login.
+Argon2 needs the optional argon2-cffi package.
+"""
+import os
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher
+
+PASSWORD_HASHING_DEFAULTS = {
+    # None keeps Django's default for the parameter
+    'PBKDF2_ITERATIONS': None,
+    'ARGON2_TIME_COST': None,
+    'ARGON2_MEMORY_COST': None,  # KiB
+    'ARGON2_PARALLELISM': None,
+    'SCRYPT_WORK_FACTOR': None,  # N, a power of two
+    'SCRYPT_BLOCK_SIZE': None,
+    'SCRYPT_PARALLELISM': None,
+    # process pool hashing for the async signup/login views (users.hashing);
+    # 0 hashes in a thread instead
+    'POOL_SIZE': os.cpu_count() or 1,
+    # hashes queued beyond this are refused (503) instead of waited on
+    'MAX_PENDING': 64,
+    'START_METHOD': 'spawn',
+}
+
+
+def get_password_hashing_settings():
+    return {**PASSWORD_HASHING_DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {})}
+
+
+def _tuned(setting, default):
+    def get(self):
+        value = get_password_hashing_settings()[setting]
+        return default if value is None else value
+    return property(get)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = _tuned('PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = _tuned('ARGON2_TIME_COST', Argon2PasswordHasher.time_cost)
+    memory_cost = _tuned('ARGON2_MEMORY_COST', Argon2PasswordHasher.memory_cost)
+    parallelism = _tuned('ARGON2_PARALLELISM', Argon2PasswordHasher.parallelism)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = _tuned('SCRYPT_WORK_FACTOR', ScryptPasswordHasher.work_factor)
+    block_size = _tuned('SCRYPT_BLOCK_SIZE', ScryptPasswordHasher.block_size)
+    parallelism = _tuned('SCRYPT_PARALLELISM', ScryptPasswordHasher.parallelism)
+
+    @property
+    def maxmem(self):
+        # scrypt needs 128 * N * r bytes; OpenSSL refuses more than 32 MiB by default
+        return 2 * 128 * self.work_factor * self.block_size
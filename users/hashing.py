@@ -0,0 +1,120 @@
+"""
+Password hashing off the request worker, for the async signup/login views.
+
+Hashes run in a pool of PASSWORD_HASHING['POOL_SIZE'] processes (one per
+core by default), so they neither block the event loop nor contend for the
+GIL. At most MAX_PENDING hashes wait for the pool; past that HashingBusy is
+raised and the views answer 503 rather than queueing logins that would
+time out anyway; they do the same when a pool worker dies or a fresh
+pool can't take the hash either (HashingUnavailable). With POOL_SIZE 0 hashing runs in a thread instead.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+from .hashers import get_password_hashing_settings
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class HashingUnavailable(HashingBusy):
+    """The pool broke or was shut down; the next call starts a fresh pool."""
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def _hash(password):
+    return make_password(password)
+
+
+def _verify(password, encoded):
+    """(password matches, new hash if the stored one is due for a rehash else None)."""
+    rehashed = []
+    valid = check_password(password, encoded, setter=lambda raw: rehashed.append(make_password(raw)))
+    return valid, rehashed[0] if rehashed else None
+
+
+_pool = None
+_pending = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    return _get_pool()[0]
+
+
+def _get_pool():
+    """The pool and the semaphore bounding its queue, from the same generation."""
+    global _pool, _pending
+    with _pool_lock:
+        if _pool is None:
+            config = get_password_hashing_settings()
+            settings_module = getattr(settings, 'SETTINGS_MODULE', None) or os.environ['DJANGO_SETTINGS_MODULE']
+            _pool = ProcessPoolExecutor(
+                max_workers=config['POOL_SIZE'],
+                mp_context=multiprocessing.get_context(config['START_METHOD']),
+                initializer=_init_worker, initargs=(settings_module,),
+            )
+            _pending = threading.BoundedSemaphore(config['MAX_PENDING'])
+        return _pool, _pending
+
+
+def shutdown_hashing_pool(pool=None):
+    """
+    Shut the pool down; with `pool`, only if it is still the current one.
+    Doesn't wait: hashes already submitted finish on the old pool while new
+    ones go to the next.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or pool not in (None, _pool):
+            return
+        pool, _pool = _pool, None
+    pool.shutdown(wait=False)
+
+
+async def _run(func, *args):
+    if not get_password_hashing_settings()['POOL_SIZE']:
+        return await asyncio.to_thread(func, *args)
+
+    for attempt in range(2):
+        # release the semaphore acquired here even if the pool is replaced meanwhile
+        pool, pending = _get_pool()
+        if not pending.acquire(blocking=False):
+            raise HashingBusy
+        try:
+            try:
+                future = pool.submit(func, *args)
+            except RuntimeError as error:  # BrokenProcessPool, or shut down since _get_pool()
+                shutdown_hashing_pool(pool)
+                if attempt:
+                    raise HashingUnavailable from error
+                continue
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool as error:
+            # a worker died; start a fresh pool for the next caller
+            shutdown_hashing_pool(pool)
+            raise HashingUnavailable from error
+        finally:
+            pending.release()
+
+
+async def hash_password(password):
+    return await _run(_hash, password)
+
+
+async def verify_password(password, encoded):
+    """(password matches, new hash if the stored one is due for a rehash else None)."""
+    return await _run(_verify, password, encoded)
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import time
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+
+from users.hashers import get_password_hashing_settings
+from users.hashing import _verify, get_hashing_pool, shutdown_hashing_pool, verify_password
+
+ALGORITHMS = ('pbkdf2_sha256', 'scrypt', 'argon2')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure logins per second per core for each configured password "
+        "hasher: password checks run inline on one worker thread, as the "
+        "sync login does, then through the process pool used by the async "
+        "login view. Hashing is what bounds login throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20, help="password checks per measurement")
+
+    def handle(self, *args, **options):
+        config = get_password_hashing_settings()
+        cores = min(config['POOL_SIZE'], os.cpu_count() or 1) if config['POOL_SIZE'] else 1
+        self.stdout.write(f"{options['logins']} logins per run, pool of {config['POOL_SIZE']} "
+                          f"on {os.cpu_count()} cores\n")
+        self.stdout.write(f"{'hasher':<16}{'ms/login':>10}{'inline/s':>10}{'pool/s':>10}{'pool/s/core':>13}")
+
+        if config['POOL_SIZE']:
+            get_hashing_pool()
+            asyncio.run(self.run_pool(_verify_known_hash(), 1))  # start the workers before timing
+        try:
+            for algorithm in ALGORITHMS:
+                try:
+                    encoded = get_hasher(algorithm).encode('bench-password', get_hasher(algorithm).salt())
+                except (ValueError, ImportError) as error:
+                    self.stdout.write(f"{algorithm:<16}skipped: {error}")
+                    continue
+
+                started = time.perf_counter()
+                for _ in range(options['logins']):
+                    _verify('bench-password', encoded)
+                inline = options['logins'] / (time.perf_counter() - started)
+
+                pooled = None
+                if config['POOL_SIZE']:
+                    started = time.perf_counter()
+                    asyncio.run(self.run_pool(encoded, options['logins'], config['MAX_PENDING']))
+                    pooled = options['logins'] / (time.perf_counter() - started)
+
+                self.stdout.write(
+                    f"{algorithm:<16}{1000 / inline:>10.1f}{inline:>10.1f}"
+                    + (f"{pooled:>10.1f}{pooled / cores:>13.1f}" if pooled else f"{'-':>10}{'-':>13}")
+                )
+        finally:
+            shutdown_hashing_pool()
+
+    @staticmethod
+    async def run_pool(encoded, logins, max_pending=1):
+        pending = asyncio.Semaphore(max_pending)
+
+        async def login():
+            async with pending:
+                await verify_password('bench-password', encoded)
+
+        await asyncio.gather(*(login() for _ in range(logins)))
+
+
+def _verify_known_hash():
+    hasher = get_hasher()
+    return hasher.encode('bench-password', hasher.salt())
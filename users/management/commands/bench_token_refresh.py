@@ -0,0 +1,88 @@
+import statistics
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.state import token_backend
+
+from users.serializers import SingleFlightTokenRefreshSerializer
+from users.tokens import UserRefreshToken
+
+User = get_user_model()
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate refresh storms, i.e. concurrent refreshes of the same refresh "
+        "token, against simplejwt's TokenRefreshSerializer and the single-flight "
+        "serializer behind /users/token/refresh/. Reports token signings, queries "
+        "and per-refresh latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=10, help="parallel refreshes per storm")
+        parser.add_argument('--storms', type=int, default=50)
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username='bench-token-refresh')
+        try:
+            self.stdout.write(f"{options['storms']} storms x {options['concurrency']} concurrent refreshes\n")
+            self.stdout.write(f"{'serializer':<16}{'signings':>10}{'selects':>10}{'writes':>10}"
+                              f"{'p50 ms':>10}{'p95 ms':>10}")
+            for name, serializer_class in [('simplejwt', TokenRefreshSerializer),
+                                           ('single-flight', SingleFlightTokenRefreshSerializer)]:
+                stats = self.run(user, serializer_class, options)
+                quantiles = statistics.quantiles(stats['latencies'], n=100)
+                self.stdout.write(
+                    f"{name:<16}{stats['signings']:>10}{stats['selects']:>10}{stats['writes']:>10}"
+                    f"{quantiles[49] * 1000:>10.2f}{quantiles[94] * 1000:>10.2f}"
+                )
+        finally:
+            user.delete()
+
+    def run(self, user, serializer_class, options):
+        stats = {'signings': 0, 'selects': 0, 'writes': 0, 'latencies': []}
+        lock = threading.Lock()
+        encode = token_backend.encode
+
+        def counting_encode(payload):
+            with lock:
+                stats['signings'] += 1
+            return encode(payload)
+
+        def count_queries(execute, sql, params, many, context):
+            with lock:
+                stats['writes' if sql.lstrip().upper().startswith(WRITE_STATEMENTS) else 'selects'] += 1
+            return execute(sql, params, many, context)
+
+        def worker(token, barrier):
+            with connection.execute_wrapper(count_queries):
+                barrier.wait()
+                started = time.perf_counter()
+                serializer = serializer_class(data={'refresh': token})
+                serializer.is_valid(raise_exception=True)
+                elapsed = time.perf_counter() - started
+            connection.close()
+            with lock:
+                stats['latencies'].append(elapsed)
+
+        # one fresh refresh token per storm, signed before counting starts
+        tokens = [str(UserRefreshToken.for_user(user)) for _ in range(options['storms'])]
+        token_backend.encode = counting_encode
+        try:
+            for token in tokens:
+                barrier = threading.Barrier(options['concurrency'])
+                threads = [threading.Thread(target=worker, args=(token, barrier))
+                           for _ in range(options['concurrency'])]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            del token_backend.encode
+        return stats
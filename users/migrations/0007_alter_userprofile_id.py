@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:12
+
+import base.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_alter_userprofile_table'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='id',
+            field=models.UUIDField(default=base.ids.uuid7, primary_key=True, serialize=False),
+        ),
+    ]
@@ -17,5 +17,16 @@ class UserProfile(BaseModel):
         verbose_name = 'User Profile'
         verbose_name_plural = 'User Profiles'
 
-        
 
+class TokenVersion(models.Model):
+    """
+    The user's current token version (see users.tokens). No foreign key
+    constraint, so the row outlives the user and a deleted user's tokens
+    stay revoked.
+    """
+    user = models.OneToOneField(to=get_user_model(), on_delete=models.DO_NOTHING, db_constraint=False,
+                                primary_key=True, related_name='+')
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'User_Token_Versions'
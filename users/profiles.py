@@ -0,0 +1,45 @@
+"""
+Cached, rendered user profiles for `me` and login.
+
+A profile is read with its whole address chain in one query and its
+UserProfileViewSerializer output cached per user. Saving or deleting the
+profile, its Address or its User drops the entry (see users.signals). The
+key also carries the geo cache version, so renaming a city, state or
+country invalidates the names embedded in every cached address.
+"""
+from django.core.cache import cache
+
+from base.cache import get_cache_version
+from misc.signals import GEO_CACHE_GROUP
+from .models import UserProfile
+
+PROFILE_CACHE_TIMEOUT = 60 * 60
+
+
+def profile_queryset():
+    return UserProfile.objects.select_related('user', 'address__city__state__country')
+
+
+def profile_cache_key(user_id, version=None):
+    if version is None:
+        version = get_cache_version(GEO_CACHE_GROUP)
+    return f'profile:{version}:{user_id}'
+
+
+def get_profile_data(user):
+    """The rendered profile of `user`, or None if they have none."""
+    from .serializers import UserProfileViewSerializer
+
+    key = profile_cache_key(user.pk)
+    data = cache.get(key)
+    if data is None:
+        profile = profile_queryset().filter(user=user).first()
+        if profile is None:
+            return None
+        data = UserProfileViewSerializer(profile).data
+        cache.set(key, data, PROFILE_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_profile(user_id):
+    cache.delete(profile_cache_key(user_id))
@@ -0,0 +1,124 @@
+"""
+Single-flight token refresh.
+
+A page that fires several requests with an expired access token makes the
+frontend refresh once per request, all with the same refresh token.
+`refresh_once` lets one of them (the leader) do the work and hands its
+result to the others:
+
+- within a process, callers with the same token wait for the leader's
+  result;
+- across processes, the leader holds a lock in the shared cache and
+  publishes the result there for GRACE_SECONDS, so refreshes of that token
+  from other workers in the window reuse it.
+
+When the shared cache is unavailable, a local-memory cache stands in, so
+coalescing degrades to per-process rather than failing the refresh.
+"""
+import copy
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REFRESH_DEFAULTS = {
+    # how long a refresh result is handed to repeat refreshes of the same token
+    'GRACE_SECONDS': 10,
+    # how long a caller waits for another worker's refresh before doing its own
+    'WAIT_SECONDS': 5,
+}
+
+POLL_INTERVAL = 0.01
+
+_local_cache = LocMemCache('token-refresh', {})
+
+
+def get_token_refresh_settings():
+    return {**TOKEN_REFRESH_DEFAULTS, **getattr(settings, 'TOKEN_REFRESH', {})}
+
+
+def _cache_call(method, *args):
+    try:
+        return getattr(cache, method)(*args)
+    except Exception:
+        logger.warning("Shared cache unavailable for token refresh, using local memory", exc_info=True)
+        return getattr(_local_cache, method)(*args)
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def refresh_once(refresh_token, refresh):
+    """
+    Return `refresh()` for `refresh_token`, sharing one call among every
+    concurrent (or GRACE_SECONDS-recent) refresh of the same token.
+    Errors are re-raised to the callers that waited on them, not cached.
+    """
+    config = get_token_refresh_settings()
+    key = 'token-refresh:' + hashlib.sha256(refresh_token.encode()).hexdigest()
+
+    result = _cache_call('get', key)
+    if result is not None:
+        return result
+
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+
+    if not leader:
+        if call.done.wait(config['WAIT_SECONDS']):
+            if call.error is not None:
+                raise copy.copy(call.error)
+            return call.result
+        return refresh()
+
+    try:
+        call.result = _lead(key, refresh, config)
+        return call.result
+    except Exception as error:
+        call.error = error
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        call.done.set()
+
+
+def _lead(key, refresh, config):
+    lock_key = key + ':lock'
+    deadline = time.monotonic() + config['WAIT_SECONDS']
+    while not _cache_call('add', lock_key, 1, config['WAIT_SECONDS']):
+        # another worker is refreshing this token
+        result = _cache_call('get', key)
+        if result is not None:
+            return result
+        if time.monotonic() >= deadline:
+            return refresh()
+        time.sleep(POLL_INTERVAL)
+
+    try:
+        # the previous holder may have just published it
+        result = _cache_call('get', key)
+        if result is None:
+            result = refresh()
+            _cache_call('set', key, result, config['GRACE_SECONDS'])
+        return result
+    finally:
+        _cache_call('delete', lock_key)
@@ -3,10 +3,14 @@ from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework.exceptions import ValidationError
 
 from .models import UserProfile
+from .refresh import refresh_once
+from .tokens import TOKEN_VERSION_CLAIM, UserRefreshToken, get_token_version
 from base.serializers import BaseModelSerializer
 from misc.models import Address, City, State, Country
 from misc.serializers import AddressCreateUpdateSerializer,AddressSerializer
@@ -41,9 +45,14 @@ class UserProfileSignupSerializer(BaseModelSerializer):
         
         username = validated_data.pop('username')
         password = validated_data.pop('password')
+        # already hashed off the request worker by the async signup view
+        password_hash = validated_data.pop('password_hash', None)
         validated_data.pop('confirm_password')
            
-        user = User.objects.create_user(username=username, password=password)
+        if password_hash:
+            user = User.objects.create(username=User.normalize_username(username), password=password_hash)
+        else:
+            user = User.objects.create_user(username=username, password=password)
             
         validated_data['user'] = user
         return UserProfile.objects.create(**validated_data)
@@ -93,18 +102,45 @@ class UserProfileViewSerializer(BaseModelSerializer):
         read_only_fields = fields
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = UserRefreshToken
+
     def validate(self, attrs):
         data = super().validate(attrs)
+        data['user'] = self.user_data(self.user)
+        return data
 
-        profile = UserProfile.objects.get(user=self.user)
+    @staticmethod
+    def user_data(user):
+        # imported here: users.profiles renders with the serializers above
+        from .profiles import get_profile_data
 
-        data['user'] = {
-            'id': profile.id,
-            'username': self.user.username,
-            'first_name': profile.first_name,
-            'last_name': profile.last_name,
-            'email': self.user.email,
-        }
+        profile = get_profile_data(user) or {}
 
-        return data
+        return {
+            'id': profile.get('id'),
+            'username': user.username,
+            'first_name': profile.get('first_name'),
+            'last_name': profile.get('last_name'),
+            'email': user.email,
+        }
     
+
+
+class SingleFlightTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    TokenRefreshSerializer that coalesces concurrent refreshes of the same
+    token (see users.refresh) and rejects revoked refresh tokens.
+    """
+    token_class = UserRefreshToken
+
+    def validate(self, attrs):
+        # checked on every call, not only by the leader, so a result shared
+        # within the grace window isn't handed out after a revocation
+        token = self.token_class(attrs['refresh'])
+        version = token.get(TOKEN_VERSION_CLAIM)
+        if version is not None and version < get_token_version(token[api_settings.USER_ID_CLAIM]):
+            raise AuthenticationFailed("Token has been revoked", "token_revoked")
+        return refresh_once(attrs['refresh'], lambda: self.perform_refresh(attrs))
+
+    def perform_refresh(self, attrs):
+        return super().validate(attrs)
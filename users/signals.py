@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from misc.models import Address
+from .models import UserProfile
+from .profiles import invalidate_profile
+from .tokens import revoke_user_tokens
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_on_change(sender, instance, **kwargs):
+    invalidate_profile(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_profile_on_user_change(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields == {'last_login'}:
+        return
+    invalidate_profile(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_user_change(sender, instance, created=False, update_fields=None, **kwargs):
+    # tokens embed the username and active flag, and the user's permissions
+    # may have changed along with them
+    if created or update_fields == {'last_login'}:
+        return
+    revoke_user_tokens(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def revoke_tokens_on_permission_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        revoke_user_tokens(instance.pk)
+    else:  # changed from the group / permission side; clear() doesn't say which users
+        for user_id in pk_set or ():
+            revoke_user_tokens(user_id)
+
+
+@receiver(post_save, sender=Address)
+@receiver(pre_delete, sender=Address)  # before SET_NULL detaches the profiles
+def invalidate_profiles_on_address_change(sender, instance, created=False, **kwargs):
+    if created:
+        return  # nothing references it yet
+    for user_id in UserProfile.objects.filter(address=instance).values_list('user_id', flat=True):
+        invalidate_profile(user_id)
@@ -1,3 +1,309 @@
-from django.test import TestCase
+import asyncio
+import os
+import threading
+import time
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from base.queries import QueryRecorder
+from base.testing import QueryBudgetTestCase
+from misc.models import Address, City, Country, State
+from .checks import check_token_version_cache
+from .models import TokenVersion, UserProfile
+from .hashers import TunedPBKDF2PasswordHasher
+from . import hashing
+from .hashing import HashingUnavailable, get_hashing_pool, shutdown_hashing_pool, verify_password
+from .profiles import get_profile_data
+from .refresh import refresh_once
+from .tokens import UserRefreshToken, get_token_version, revoke_user_tokens, token_version_key
+from .views import UserProfileViewSet
+
+User = get_user_model()
+
+
+class UserProfileQueryBudgetTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('profile', password='password123')
+        country = Country.objects.create(name='INDIA', code='IN')
+        state = State.objects.create(name='GUJARAT', code='GJ', country=country)
+        city = City.objects.create(name='AHMEDABAD', code='AMD', state=state)
+        address = Address.objects.create(primary_address='Street 1', pincode='380001', city=city)
+        self.profile = UserProfile.objects.create(
+            user=self.user, first_name='First', last_name='Last', dob=date(2000, 1, 1),
+            contact_number='9999999999', address=address,
+        )
+        self.authenticate(self.user)
+
+    def test_me(self):
+        with self.assertQueryBudget(UserProfileViewSet, 'me'):
+            response = self.client.get('/users/profile/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['address']['country_name'], 'INDIA')
+
+    def test_me_patch(self):
+        with self.assertQueryBudget(UserProfileViewSet, 'me'):
+            response = self.client.patch('/users/profile/me/', {'first_name': 'Changed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_retrieve(self):
+        with self.assertQueryBudget(UserProfileViewSet, 'retrieve'):
+            response = self.client.get(f'/users/profile/{self.profile.pk}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_list(self):
+        with self.assertQueryBudget(UserProfileViewSet, 'list'):
+            response = self.client.get('/users/profile/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_me_cached_until_changed(self):
+        self.client.get('/users/profile/me/')
+        with self.assertNumQueries(0):  # the user comes from the token claims
+            response = self.client.get('/users/profile/me/')
+        self.assertEqual(response.data['address']['primary_address'], 'Street 1')
+
+        address = self.profile.address
+        address.primary_address = 'Street 2'
+        address.save()
+        self.assertEqual(self.client.get('/users/profile/me/').data['address']['primary_address'], 'Street 2')
+
+        city = address.city
+        city.name = 'AMDAVAD'
+        city.save()  # bumps the geo cache version embedded in the key
+        self.assertEqual(self.client.get('/users/profile/me/').data['address']['city_name'], 'AMDAVAD')
+
+    def test_login_reuses_cached_profile(self):
+        self.client.credentials()
+        get_profile_data(self.user)
+        with self.assertNumQueries(1):  # the user lookup for the password check
+            response = self.client.post('/users/login/', {'username': 'profile', 'password': 'password123'},
+                                        format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['first_name'], 'First')
+
+
+class StatelessAuthenticationTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('stateless', password='password123')
+        self.authenticate(self.user)
+
+    def test_user_not_loaded(self):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.client.post('/misc/countries/', {'name': 'INDIA', 'code': 'IN'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Country.objects.get().created_by_id, self.user.pk)
+        self.assertFalse([sql for sql in recorder.queries if 'FROM "auth_user"' in sql])
+
+    def test_revoked_tokens_rejected(self):
+        self.assertEqual(self.client.get('/misc/countries/').status_code, 200)
+        revoke_user_tokens(self.user.pk)
+        self.assertEqual(self.client.get('/misc/countries/').status_code, 401)
+
+        self.authenticate(self.user)
+        self.assertEqual(self.client.get('/misc/countries/').status_code, 200)
+
+    def test_revocation_survives_cache_eviction(self):
+        version = revoke_user_tokens(self.user.pk)
+        cache.delete(token_version_key(self.user.pk))
+        self.assertEqual(self.client.get('/misc/countries/').status_code, 401)
+        self.assertEqual(TokenVersion.objects.get(user=self.user).version, version)
+
+        # reloaded into the cache by the request above
+        with self.assertNumQueries(0):
+            self.assertEqual(get_token_version(self.user.pk), version)
+
+    def test_deleted_user_stays_revoked(self):
+        user_id = self.user.pk
+        self.user.delete()
+        cache.delete(token_version_key(user_id))
+        self.assertGreater(get_token_version(user_id), 0)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_cache_fails_deploy_check(self):
+        self.assertEqual([error.id for error in check_token_version_cache(None)], ['users.E001'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}})
+    def test_shared_cache_passes_deploy_check(self):
+        self.assertEqual(check_token_version_cache(None), [])
+
+    def test_deactivation_revokes(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/misc/countries/').status_code, 401)
+
+    def test_tokens_without_claims_still_accepted(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get('/misc/countries/').status_code, 200)
+
+
+class TokenRefreshTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('refresh', password='password123')
+        self.refresh = str(UserRefreshToken.for_user(self.user))
+
+    def post_refresh(self):
+        return self.client.post('/users/token/refresh/', {'refresh': self.refresh}, format='json')
+
+    def test_repeat_refresh_within_grace_window_reuses_result(self):
+        first = self.post_refresh()
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            second = self.post_refresh()
+        self.assertEqual(second.data['access'], first.data['access'])
+
+    def test_revoked_refresh_token_rejected(self):
+        revoke_user_tokens(self.user.pk)
+        self.assertEqual(self.post_refresh().status_code, 401)
+
+    def test_revocation_within_grace_window_rejected(self):
+        self.assertEqual(self.post_refresh().status_code, 200)
+        revoke_user_tokens(self.user.pk)
+        self.assertEqual(self.post_refresh().status_code, 401)
+
+    def test_concurrent_refreshes_share_one_call(self):
+        calls = []
+        started = threading.Barrier(10)
+
+        def refresh():
+            calls.append(1)
+            time.sleep(0.05)
+            return {'access': f'token-{len(calls)}'}
+
+        def worker():
+            started.wait()
+            results.append(refresh_once('shared-token', refresh))
+
+        results = []
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'access': 'token-1'}] * 10)
+
+
+@override_settings(PASSWORD_HASHING={'POOL_SIZE': 0, 'PBKDF2_ITERATIONS': 1000})
+class AsyncSignupLoginTests(TestCase):
+
+    signup_data = {
+        'username': 'async', 'password': 'password123', 'confirm_password': 'password123',
+        'first_name': 'First', 'last_name': 'Last', 'dob': '2000-01-01', 'contact_number': '9999999999',
+    }
+
+    async def test_signup_then_login(self):
+        response = await self.async_client.post('/users/async/signup/', self.signup_data,
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['data']['user']['first_name'], 'First')
+
+        response = await self.async_client.post('/users/async/login/',
+                                                {'username': 'async', 'password': 'password123'},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['last_name'], 'Last')
+        self.assertIn('access', response.json())
+
+        response = await self.async_client.post('/users/async/login/',
+                                                {'username': 'async', 'password': 'wrong-password'},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_rehash_on_login(self):
+        await self.async_client.post('/users/async/signup/', self.signup_data, content_type='application/json')
+        user = await User.objects.aget(username='async')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+        token = str(UserRefreshToken.for_user(user).access_token)
+
+        with self.settings(PASSWORD_HASHING={'POOL_SIZE': 0, 'PBKDF2_ITERATIONS': 2000}):
+            response = await self.async_client.post('/users/async/login/',
+                                                    {'username': 'async', 'password': 'password123'},
+                                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        await user.arefresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+        # rehashing isn't a credential change: earlier tokens stay valid
+        response = await self.async_client.get('/misc/countries/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_sync_login_rehash_keeps_tokens(self):
+        user = User.objects.create_user('sync', password='password123')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+        token = str(UserRefreshToken.for_user(user).access_token)
+
+        with self.settings(PASSWORD_HASHING={'POOL_SIZE': 0, 'PBKDF2_ITERATIONS': 2000}):
+            response = self.client.post('/users/login/', {'username': 'sync', 'password': 'password123'},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+        response = self.client.get('/misc/countries/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post('/users/login/', {'username': 'sync', 'password': 'wrong-password'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+
+class HashingPoolTests(TestCase):
+
+    def tearDown(self):
+        shutdown_hashing_pool()
+
+    @override_settings(PASSWORD_HASHING={'POOL_SIZE': 1})
+    def test_verify_in_worker_process(self):
+        encoded = TunedPBKDF2PasswordHasher().encode('password123', 'salt', iterations=1000)
+        valid, new_hash = async_to_sync(verify_password)('password123', encoded)
+        self.assertTrue(valid)
+        self.assertTrue(new_hash.startswith('pbkdf2_sha256$'))  # stored iterations are below the default
+        self.assertEqual(async_to_sync(verify_password)('wrong', encoded), (False, None))
+
+    @override_settings(PASSWORD_HASHING={'POOL_SIZE': 1})
+    def test_dead_worker_starts_a_new_pool(self):
+        with self.assertRaises(HashingUnavailable):
+            async_to_sync(hashing._run)(os._exit, 1)
+        encoded = TunedPBKDF2PasswordHasher().encode('password123', 'salt', iterations=1000)
+        self.assertTrue(async_to_sync(verify_password)('password123', encoded)[0])
+
+    @override_settings(PASSWORD_HASHING={'POOL_SIZE': 1})
+    def test_in_flight_calls_release_their_own_semaphore(self):
+        async def restart_while_hashing():
+            in_flight = asyncio.ensure_future(hashing._run(time.sleep, 0.2))
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            shutdown_hashing_pool()  # doesn't wait for the in-flight call
+            self.assertLess(time.monotonic() - started, 0.1)
+            get_hashing_pool()
+            await in_flight
+
+        async_to_sync(restart_while_hashing)()
+
+    @override_settings(PASSWORD_HASHING={'POOL_SIZE': 1})
+    def test_submit_to_a_pool_shut_down_meanwhile_retries(self):
+        # shut down behind _get_pool()'s back, as a concurrent shutdown_hashing_pool() would
+        stale = get_hashing_pool()
+        stale.shutdown()
+        encoded = TunedPBKDF2PasswordHasher().encode('password123', 'salt', iterations=1000)
+        self.assertTrue(async_to_sync(verify_password)('password123', encoded)[0])
+        self.assertIsNot(get_hashing_pool(), stale)
+
+    @override_settings(PASSWORD_HASHING={'POOL_SIZE': 1})
+    def test_login_answers_503_when_the_pool_breaks(self):
+        User.objects.create_user('pooled', password='password123')
+        with mock.patch('users.views.verify_password', side_effect=HashingUnavailable):
+            response = self.client.post('/users/async/login/', {'username': 'pooled', 'password': 'password123'},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 503)
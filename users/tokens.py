@@ -0,0 +1,57 @@
+"""
+Tokens carrying the claims StatelessJWTAuthentication trusts, and the
+per-user token version used to revoke them.
+
+A token issued with a lower version than the user's current one is
+revoked. The version is stored in TokenVersion (users start at 0) and
+read through the shared cache: a miss, whether the key was never set or
+was evicted, reloads it from the table, so a revocation can't be lost.
+The cache has to be shared by every worker, see users.checks.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import TokenVersion
+
+USERNAME_CLAIM = 'username'
+ACTIVE_CLAIM = 'is_active'
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+def token_version_key(user_id):
+    return f'token-version:{user_id}'
+
+
+def get_token_version(user_id):
+    version = cache.get(token_version_key(user_id))
+    if version is None:
+        # read from the primary: a lagging replica could miss a revocation
+        version = TokenVersion.objects.using(DEFAULT_DB_ALIAS).filter(user_id=user_id).values_list(
+            'version', flat=True).first() or 0
+        cache.set(token_version_key(user_id), version, None)
+    return version
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every token issued to the user so far."""
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        row, _ = TokenVersion.objects.using(DEFAULT_DB_ALIAS).select_for_update().get_or_create(user_id=user_id)
+        row.version = max(int(time.time() * 1000), row.version + 1)
+        row.save(update_fields=['version'])
+    cache.set(token_version_key(user_id), row.version, None)
+    return row.version
+
+
+class UserRefreshToken(RefreshToken):
+    """RefreshToken with the user's username, active flag and token version (copied to its access tokens)."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[USERNAME_CLAIM] = user.get_username()
+        token[ACTIVE_CLAIM] = user.is_active
+        token[TOKEN_VERSION_CLAIM] = get_token_version(user.pk)
+        return token
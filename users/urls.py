@@ -1,11 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
+from rest_framework_simplejwt.views import TokenVerifyView
 
 from .views import (
     UserProfileSignupView,
     UserLoginView,
-    UserProfileViewSet
+    UserTokenRefreshView,
+    UserProfileViewSet,
+    async_login,
+    async_signup,
 )
 
 router = DefaultRouter()
@@ -14,7 +17,9 @@ router.register(r'profile', UserProfileViewSet, basename='userprofile')
 urlpatterns = [
     path('signup/', UserProfileSignupView.as_view(), name='user-signup'),
     path('login/', UserLoginView.as_view(), name='user-login'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
+    path('async/signup/', async_signup, name='user-async-signup'),
+    path('async/login/', async_login, name='user-async-login'),
+    path('token/refresh/', UserTokenRefreshView.as_view(), name='token-refresh'),
     path('token/verify/', TokenVerifyView.as_view(), name='token-verify'),
     
     path('', include(router.urls)),
@@ -4,24 +4,56 @@ from rest_framework.views import APIView
 from rest_framework.decorators import action
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.exceptions import ValidationError
+import json
 import logging
 
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import update_last_login
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework_simplejwt.settings import api_settings
+
+from base.renderers import dumps, orjson
+
+from .hashing import HashingBusy, hash_password, verify_password
 from .models import UserProfile
+from .tokens import UserRefreshToken
+from .profiles import get_profile_data, profile_queryset
 from .serializers import (
     UserProfileSignupSerializer,
     
     UserProfileUpdateSerializer,
     UserProfileViewSerializer,
-    CustomTokenObtainPairSerializer
+    CustomTokenObtainPairSerializer,
+    SingleFlightTokenRefreshSerializer
 )
 
 User = get_user_model()
 
 logger = logging.getLogger(__name__)
 
+def signup_response_data(instance):
+    refresh = UserRefreshToken.for_user(instance.user)
+    return {
+        'data': {
+            'user': {
+                'id': instance.id,
+                'username': instance.user.username,
+                'first_name': instance.first_name,
+                'last_name': instance.last_name,
+                'email': instance.user.email,
+            },
+            'tokens': {
+                'access': str(refresh.access_token),
+                'refresh': str(refresh),
+            }
+        }
+    }
+
+
 class UserProfileSignupView(generics.CreateAPIView):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSignupSerializer
@@ -39,29 +71,10 @@ class UserProfileSignupView(generics.CreateAPIView):
             serializer.is_valid(raise_exception=True)
             instance = serializer.save()
             
-            refresh = RefreshToken.for_user(instance.user)
-            
-            response_data = {
-                
-                'data': {
-                    'user': {
-                        'id': instance.id,
-                        'username': instance.user.username,
-                        'first_name': instance.first_name,
-                        'last_name': instance.last_name,
-                        'email': instance.user.email,
-                    },
-                    'tokens': {
-                        'access': str(refresh.access_token),
-                        'refresh': str(refresh),
-                    }
-                }
-            }
-            
-            return Response(response_data, status=status.HTTP_201_CREATED)
+            return Response(signup_response_data(instance), status=status.HTTP_201_CREATED)
 
         except ValidationError as e:
-            logger.error("User Signup failed because of ",+ str(e))
+            logger.info("User signup rejected: %s", e.detail)
             return Response(
 
                 e.detail or e.default_detail,
@@ -69,7 +82,7 @@ class UserProfileSignupView(generics.CreateAPIView):
             )
         
         except Exception as e:
-            logger.exception("User signup failed because of "+ str(e))
+            logger.exception("User signup failed")
             return Response(
                 {
                     'error': str(e)
@@ -82,25 +95,34 @@ class UserLoginView(TokenObtainPairView):
     permission_classes = [permissions.AllowAny]
     serializer_class = CustomTokenObtainPairSerializer
 
+class UserTokenRefreshView(TokenRefreshView):
+    serializer_class = SingleFlightTokenRefreshSerializer
+    query_budget = {'post': 1}
+
 class UserProfileViewSet(viewsets.ModelViewSet):
     
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'list': 3, 'retrieve': 2, 'me': 6, 'create': 4, 'update': 8, 'partial_update': 8, 'destroy': 4}
     
     @action(detail=False, methods=["get", "patch"])
     def me(self, request):
-        try:
-            profile = request.user.profiles
-        except UserProfile.DoesNotExist:
+        # ✅ GET → cached rendered profile (users.profiles)
+        if request.method == "GET":
+            data = get_profile_data(request.user)
+            if data is None:
+                return Response(
+                    {"detail": "Profile does not exist"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return Response(data, status=status.HTTP_200_OK)
+
+        profile = profile_queryset().filter(user=request.user).first()
+        if profile is None:
             return Response(
                 {"detail": "Profile does not exist"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # ✅ GET → READ serializer ONLY
-        if request.method == "GET":
-            serializer = UserProfileViewSerializer(profile)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-
         # ✅ PATCH → WRITE serializer ONLY
         write_serializer = UserProfileUpdateSerializer(
             profile,
@@ -111,12 +133,11 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         write_serializer.is_valid(raise_exception=True)
         write_serializer.save()
 
-        # ✅ return READ serializer again
-        read_serializer = UserProfileViewSerializer(profile)
-        return Response(read_serializer.data, status=status.HTTP_200_OK)
+        # ✅ return the freshly rendered (and re-cached) profile
+        return Response(get_profile_data(request.user), status=status.HTTP_200_OK)
 
     def get_queryset(self):
-        return UserProfile.objects.filter(user=self.request.user)
+        return profile_queryset().filter(user=self.request.user)
 
     def get_serializer_class(self):
         if self.action == 'update' or self.action == 'partial_update' or self.action=='patch':
@@ -143,7 +164,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         serializer.save(updated_by=self.request.user)
 
     def create(self, request, *args, **kwargs):
-        logger.info("Trying to create a user profile.")
+        logger.debug("Creating a user profile")
         try:
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
@@ -152,7 +173,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             self.perform_create(serializer)
 
             response_serializer = UserProfileViewSerializer(serializer.instance)
-            logger.info("User Profile Created Successfully")
+            logger.info("User profile created", extra={"profile_id": serializer.instance.pk})
             return Response(
                 data=response_serializer.data,
                 status= status.HTTP_201_CREATED
@@ -160,21 +181,21 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             )
         
         except ValidationError as e:
-            logger.error("User Profile Creation failed due to error "+ str(e))
+            logger.info("User profile creation rejected: %s", e.detail)
             return Response(
                 data= e.detail,
                 status = status.HTTP_400_BAD_REQUEST
             )
         
         except Exception as e:
-            logger.exception("User Profile Creation failed due to exception "+ str(e))
+            logger.exception("User profile creation failed")
             return Response(
                 data = str(e),
                 status = status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
     def update(self, request, *args, **kwargs):
-        logger.info("Trying to update a user profile.")
+        logger.debug("Updating a user profile")
         instance = self.get_object()
         partial = kwargs.pop('partial',False)
         try:
@@ -187,7 +208,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             self.perform_update(serializer)
 
             response_serializer = UserProfileViewSerializer(serializer.instance)
-            logger.info("User Profile Updated Successfully")
+            logger.info("User profile updated", extra={"profile_id": serializer.instance.pk})
             return Response(
                 data=response_serializer.data,
                 status= status.HTTP_201_CREATED
@@ -195,16 +216,96 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             )
         
         except ValidationError as e:
-            logger.error("User Profile updates failed due to error "+str(e))
+            logger.info("User profile update rejected: %s", e.detail)
             return Response(
                 data= e.detail,
                 status = status.HTTP_400_BAD_REQUEST
             )
         
         except Exception as e:
-            logger.exception("User Profile Updates failed due to exception "+str(e))
+            logger.exception("User profile update failed")
             return Response(
                 data = str(e),
                 status = status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
+
+
+# Async signup / login for ASGI deployments (PMS.asgi). Password hashing,
+# the expensive part of both, runs in the process pool of users.hashing
+# while the event loop keeps serving other requests.
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+def hashing_busy_response():
+    response = json_response({'detail': "Password hashing is busy, retry shortly"},
+                             status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = '1'
+    return response
+
+
+def parse_json_body(request):
+    try:
+        data = orjson.loads(request.body) if orjson else json.loads(request.body)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+@csrf_exempt
+@require_POST
+async def async_signup(request):
+    data = parse_json_body(request)
+    if data is None:
+        return json_response({'detail': "JSON object expected"}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = UserProfileSignupSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        password_hash = await hash_password(serializer.validated_data['password'])
+    except HashingBusy:
+        return hashing_busy_response()
+
+    instance = await sync_to_async(serializer.save)(password_hash=password_hash)
+    return json_response(await sync_to_async(signup_response_data)(instance), status=status.HTTP_201_CREATED)
+
+
+@csrf_exempt
+@require_POST
+async def async_login(request):
+    data = parse_json_body(request) or {}
+    username, password = data.get(User.USERNAME_FIELD), data.get('password')
+    if not username or not password:
+        return json_response({'detail': "username and password are required"},
+                             status=status.HTTP_400_BAD_REQUEST)
+
+    user = await User._default_manager.filter(**{User.USERNAME_FIELD: username}).afirst()
+    try:
+        if user is None:
+            # hash anyway so unknown usernames take as long as wrong passwords (as ModelBackend does)
+            await hash_password(password)
+            valid, new_hash = False, None
+        else:
+            valid, new_hash = await verify_password(password, user.password)
+    except HashingBusy:
+        return hashing_busy_response()
+
+    if not valid or not api_settings.USER_AUTHENTICATION_RULE(user):
+        return json_response({'detail': "No active account found with the given credentials"},
+                             status=status.HTTP_401_UNAUTHORIZED)
+
+    if new_hash:
+        # queryset update: a rehash isn't a credential change, so it mustn't revoke tokens
+        await User._default_manager.filter(pk=user.pk).aupdate(password=new_hash)
+    if api_settings.UPDATE_LAST_LOGIN:
+        await sync_to_async(update_last_login)(None, user)
+
+    refresh = UserRefreshToken.for_user(user)
+    return json_response({
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+        'user': await sync_to_async(CustomTokenObtainPairSerializer.user_data)(user),
+    })